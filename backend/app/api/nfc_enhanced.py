@@ -20,6 +20,7 @@ from slowapi.errors import RateLimitExceeded
 import asyncio
 import json
 import hashlib
+import re
 import time
 import uuid
 from functools import lru_cache
@@ -89,6 +90,11 @@ class NFCBatchScanRequest(BaseModel):
 class NFCValidator:
     """Enhanced NFC data validation"""
     
+    # FeliCa IDm: 8 bytes as 16 hex digits
+    _HEX16 = re.compile(r"^[0-9A-Fa-f]{16}\Z")
+    # Uppercase hex letters and drop whitespace in a single pass
+    _IDM_TRANSLATION = str.maketrans("abcdef", "ABCDEF", " \t\r\n")
+    
     @staticmethod
     def validate_card_data(card_data: Dict[str, Any]) -> bool:
         """Validate NFC card data structure"""
@@ -102,7 +108,7 @@ class NFCValidator:
         
         # Validate IDm format (should be hex string)
         idm = card_data.get("idm", "")
-        if not isinstance(idm, str) or len(idm) < 16:
+        if not isinstance(idm, str) or NFCValidator._HEX16.match(idm.strip()) is None:
             logger.error(f"Invalid IDm format: {idm}")
             return False
         
@@ -121,7 +127,7 @@ class NFCValidator:
         sanitized = {}
         
         # Extract and clean IDm
-        idm = card_data.get("idm", "").strip().upper()
+        idm = card_data.get("idm", "").translate(NFCValidator._IDM_TRANSLATION)
         sanitized["idm"] = idm
         
         # Normalize card type
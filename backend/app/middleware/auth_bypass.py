@@ -5,11 +5,22 @@
 """
 
 import os
+from functools import lru_cache
 from fastapi import Request
 from typing import Dict, Any, Optional
 
-# 環境変数でバイパスモードを制御
-BYPASS_AUTH = os.getenv("BYPASS_AUTH", "false").lower() == "true"
+
+@lru_cache(maxsize=1)
+def bypass_enabled() -> bool:
+    """
+    BYPASS_AUTH環境変数が有効かどうか
+
+    バイパス可否はこの関数だけで判定する（auth_utils もこの関数を参照する）。
+    初回呼び出し時に一度だけ環境変数を読み、以降はプロセスが終了するまで
+    同じ値を返す。実行中に環境変数を変更しても反映されないため、
+    再評価が必要な場合（テストなど）は ``bypass_enabled.cache_clear()`` を呼ぶ。
+    """
+    return os.environ.get("BYPASS_AUTH", "false").lower() == "true"
 
 
 async def auth_bypass_middleware(request: Request) -> Optional[Dict[str, Any]]:
@@ -24,7 +35,7 @@ async def auth_bypass_middleware(request: Request) -> Optional[Dict[str, Any]]:
     Returns:
         Optional[Dict[str, Any]]: テスト用認証情報またはNone
     """
-    if BYPASS_AUTH:
+    if bypass_enabled():
         # テスト用の偽認証情報を返す
         return {
             "user_id": "test_admin",
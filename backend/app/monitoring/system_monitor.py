@@ -175,13 +175,15 @@ class SystemMonitor:
     
     def __init__(self, 
                  redis_url: str = "redis://localhost:6379",
-                 alert_webhook_url: Optional[str] = None):
+                 alert_webhook_url: Optional[str] = None,
+                 redis_pool: Optional[redis.ConnectionPool] = None):
         # Metrics collection
         self.metrics_collector = MetricsCollector()
         self.anomaly_detector = AnomalyDetector()
         
         # Redis for distributed state
         self.redis_url = redis_url
+        self.redis_pool = redis_pool
         self.redis_client: Optional[redis.Redis] = None
         
         # Alerts
@@ -215,7 +217,11 @@ class SystemMonitor:
         """Initialize the monitoring system"""
         try:
             # Initialize Redis
-            self.redis_client = redis.from_url(self.redis_url, decode_responses=True)
+            if self.redis_pool is not None:
+                # Shared pool: closing the client does not disconnect it
+                self.redis_client = redis.Redis(connection_pool=self.redis_pool)
+            else:
+                self.redis_client = redis.from_url(self.redis_url, decode_responses=True)
             await self.redis_client.ping()
             logger.info("Monitoring system Redis connection established")
             
@@ -6,7 +6,7 @@ import os
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 
 
 def apply_spa_mount(app: FastAPI) -> None:
@@ -27,6 +27,10 @@ def apply_spa_mount(app: FastAPI) -> None:
     if assets_dir.exists():
         app.mount("/assets", StaticFiles(directory=str(assets_dir)), name="assets")
 
+    # index.htmlはマウント時に一度だけ読み込む（SPAの画面遷移ごとのstat/openを省く）
+    index_path = static_dir / "index.html"
+    index_bytes = index_path.read_bytes() if index_path.is_file() else None
+
     # SPAフォールバック: APIルート以外はすべてindex.htmlを返す
     @app.get("/{full_path:path}")
     async def spa_fallback(full_path: str):
@@ -47,9 +51,8 @@ def apply_spa_mount(app: FastAPI) -> None:
             return FileResponse(str(static_file))
 
         # それ以外はすべてindex.htmlを返す（SPAルーティング）
-        index_path = static_dir / "index.html"
-        if index_path.exists():
-            return FileResponse(str(index_path))
+        if index_bytes is not None:
+            return Response(content=index_bytes, media_type="text/html")
 
         # index.htmlが見つからない場合（通常は発生しない）
         return {"error": "SPA not found"}
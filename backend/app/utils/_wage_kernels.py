@@ -0,0 +1,101 @@
+"""
+賃金計算の数値カーネル
+
+WageCalculator から呼び出す float64 の計算部分。
+numba は任意依存（poetry の extras "jit"）。インストールされていれば
+JITコンパイルし、未インストールの環境ではJITなしの Python/NumPy で実行する。
+どちらの経路でも結果は一致する（tests/utils/test_wage_calculator.py で確認）。
+
+カーネルを追加する場合も必ず cache=True を付けること。
+初回呼び出し時のコンパイル結果を保存し、次回以降のプロセスではそれを読み込む。
+保存先は環境変数 NUMBA_CACHE_DIR（未設定なら numba 既定の __pycache__）。
+このモジュールでは設定しないので、事前コンパイル
+（python validate_enhancements.py --warm-cache）の結果を使うには
+アプリ・CI でも同じ NUMBA_CACHE_DIR を export すること。
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba は任意依存
+    def njit(*args, **kwargs):
+        """numba未導入時は関数をそのまま返す"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# 浮動小数点誤差で 0.01 単位の切り捨てが1つ下にずれないための補正値（単位: 0.01）
+_FLOOR_EPSILON = 1e-6
+
+
+@njit(cache=True)
+def floor_to_unit(amount, unit):
+    """
+    金額を指定単位で切り捨て（Decimal の ROUND_DOWN 相当）
+
+    Args:
+        amount: 金額
+        unit: 丸め単位（0.01 なら銭、1.0 なら円）
+
+    Returns:
+        切り捨て後の金額
+    """
+    # unit を掛け戻すと 674.1800000000001 のような誤差が残るため、
+    # 整数の逆数で割って10進表記どおりの値にする
+    scale = np.round(1.0 / unit)
+    return np.floor(amount * scale + _FLOOR_EPSILON) / scale
+
+
+@njit(cache=True)
+def daily_wage_kernel(
+    hourly_rate,
+    regular_minutes,
+    overtime_minutes,
+    night_minutes,
+    holiday_minutes,
+    overtime_rate,
+    night_rate,
+    holiday_rate
+):
+    """
+    日次賃金の各項目を計算
+
+    分単位の時間は掛け算を済ませてから60で割り、丸め誤差を抑える。
+
+    Returns:
+        (基本給, 残業代, 深夜手当, 休日手当, 合計) ※いずれも丸め前
+    """
+    basic = hourly_rate * regular_minutes / 60.0
+    overtime = hourly_rate * overtime_minutes * overtime_rate / 60.0
+    night = hourly_rate * night_minutes * (night_rate - 1.0) / 60.0
+    holiday = hourly_rate * holiday_minutes * holiday_rate / 60.0
+    total = basic + overtime + night + holiday
+    return basic, overtime, night, holiday, total
+
+
+@njit(cache=True)
+def overtime_wage_kernel(
+    hourly_rate,
+    overtime_hours,
+    monthly_overtime_minutes,
+    threshold_hours,
+    overtime_rate_normal,
+    overtime_rate_heavy
+):
+    """
+    月60時間超の割増率を考慮した残業代
+
+    分岐を使わず min/max 相当の演算で通常分・超過分に分けるため、
+    スカラーでも従業員ごとの配列でも同じ式で計算できる。
+
+    Returns:
+        残業代（丸め前）
+    """
+    over_threshold = monthly_overtime_minutes > threshold_hours * 60.0
+    heavy_hours = np.maximum(overtime_hours - threshold_hours, 0.0) * over_threshold
+    normal_hours = overtime_hours - heavy_hours
+    return hourly_rate * (
+        normal_hours * overtime_rate_normal + heavy_hours * overtime_rate_heavy
+    )
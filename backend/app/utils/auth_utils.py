@@ -4,7 +4,6 @@
 認証関連のユーティリティ関数
 """
 
-import os
 import inspect
 from typing import Dict, Any, Optional, Iterable
 from fastapi import Depends, HTTPException, status
@@ -13,6 +12,7 @@ from sqlalchemy.orm import Session
 from backend.app.database import get_db
 from backend.app.models import User, UserRole
 from backend.app.api.auth import get_current_user, get_current_active_user
+from backend.app.middleware.auth_bypass import bypass_enabled
 
 
 def get_current_user_or_bypass(
@@ -29,7 +29,7 @@ def get_current_user_or_bypass(
     Returns:
         Dict[str, Any]: ユーザー情報
     """
-    if os.getenv("BYPASS_AUTH", "false").lower() == "true":
+    if bypass_enabled():
         return {
             "user_id": "bypass_user",
             "id": 1,
@@ -52,7 +52,7 @@ def get_current_user_or_bypass(
         return get_current_user()
     except Exception:
         # 認証エラーの場合もバイパスモードならテストユーザーを返す
-        if os.getenv("BYPASS_AUTH", "false").lower() == "true":
+        if bypass_enabled():
             return {
                 "user_id": "bypass_user",
                 "id": 1,
@@ -82,7 +82,7 @@ def require_permission_or_bypass(permission: str):
     async def permission_checker(
         current_user = Depends(get_current_user_or_bypass)
     ) -> Dict[str, Any]:
-        if os.getenv("BYPASS_AUTH", "false").lower() == "true":
+        if bypass_enabled():
             # バイパスモードでは全権限を持つ
             return current_user
         
@@ -8,12 +8,36 @@ import logging
 import logging.handlers
 import os
 import json
+import re
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any
 
 from config.config import config
 
+try:
+    # orjsonが利用可能な場合は高速なシリアライザを使用
+    import orjson
+
+    def _dumps(data: Dict[str, Any]) -> str:
+        try:
+            # extraのdictは int キーを含むことがあるため、標準jsonと同様に文字列化する
+            return orjson.dumps(
+                data, default=str, option=orjson.OPT_NON_STR_KEYS
+            ).decode("utf-8")
+        except TypeError:
+            # 64bitを超える整数など、orjsonで扱えない値は標準jsonで出力する
+            return json.dumps(data, ensure_ascii=False, default=str)
+except ImportError:
+    def _dumps(data: Dict[str, Any]) -> str:
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+# LogRecordが標準で持つ属性名（extraで渡された属性と区別するために使用）
+_RESERVED_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", logging.NOTSET, "", 0, "", (), None))
+) | {"message", "asctime"}
+
 
 class JSONFormatter(logging.Formatter):
     """JSON形式でログを出力するフォーマッター"""
@@ -33,31 +57,30 @@ class JSONFormatter(logging.Formatter):
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
         
-        # 追加の属性がある場合
-        if hasattr(record, 'employee_id'):
-            log_data["employee_id"] = record.employee_id
-        if hasattr(record, 'punch_type'):
-            log_data["punch_type"] = record.punch_type
-        if hasattr(record, 'device_type'):
-            log_data["device_type"] = record.device_type
-        if hasattr(record, 'processing_time'):
-            log_data["processing_time"] = record.processing_time
+        # extraで渡された追加の属性
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_RECORD_ATTRS and key not in log_data:
+                log_data[key] = value
         
-        return json.dumps(log_data, ensure_ascii=False)
+        return _dumps(log_data)
 
 
 class SecurityAuditFilter(logging.Filter):
     """セキュリティ監査用のログフィルター"""
     
+    SECURITY_KEYWORDS = (
+        'security', 'auth', 'login', 'access', 'permission',
+        'hash', 'idm', 'card', 'unauthorized'
+    )
+    # 全キーワードを1パスで照合するため、モジュール読み込み時に一度だけコンパイル
+    _AUDIT_MATCHER = re.compile(
+        "|".join(re.escape(keyword) for keyword in SECURITY_KEYWORDS),
+        re.IGNORECASE,
+    )
+    
     def filter(self, record: logging.LogRecord) -> bool:
         # セキュリティ関連のログのみを通す
-        security_keywords = [
-            'security', 'auth', 'login', 'access', 'permission',
-            'hash', 'idm', 'card', 'unauthorized'
-        ]
-        
-        message = record.getMessage().lower()
-        return any(keyword in message for keyword in security_keywords)
+        return self._AUDIT_MATCHER.search(record.getMessage()) is not None
 
 
 def setup_logging():
@@ -173,22 +196,31 @@ def log_punch_event(
 ):
     """打刻イベントをログに記録"""
     punch_logger = logging.getLogger('punch')
+    if not punch_logger.isEnabledFor(logging.INFO if success else logging.ERROR):
+        return
     
+    # 詳細はextraで渡し、メッセージの整形はハンドラーが受理した場合のみ行う
     log_data = {
         "employee_id": employee_id,
         "punch_type": punch_type,
         "success": success,
         "processing_time": processing_time,
-        "timestamp": datetime.utcnow().isoformat()
     }
     
     if error_message:
         log_data["error"] = error_message
     
     if success:
-        punch_logger.info(f"打刻成功: {json.dumps(log_data, ensure_ascii=False)}")
+        punch_logger.info(
+            "打刻成功: employee_id=%s type=%s", employee_id, punch_type,
+            extra=log_data
+        )
     else:
-        punch_logger.error(f"打刻失敗: {json.dumps(log_data, ensure_ascii=False)}")
+        punch_logger.error(
+            "打刻失敗: employee_id=%s type=%s error=%s",
+            employee_id, punch_type, error_message,
+            extra=log_data
+        )
 
 
 def log_performance_metric(
@@ -199,18 +231,28 @@ def log_performance_metric(
 ):
     """パフォーマンスメトリクスをログに記録"""
     performance_logger = logging.getLogger('performance')
+    if not performance_logger.isEnabledFor(logging.INFO):
+        return
     
+    duration_ms = round(duration * 1000, 2)
     log_data = {
         "operation": operation,
-        "duration_ms": round(duration * 1000, 2),
+        "duration_ms": duration_ms,
         "success": success,
-        "timestamp": datetime.utcnow().isoformat()
     }
     
     if metadata:
-        log_data.update(metadata)
+        # LogRecordの標準属性と衝突するキーはextraに渡せないため接頭辞を付ける
+        for key, value in metadata.items():
+            if key in _RESERVED_RECORD_ATTRS:
+                key = f"meta_{key}"
+            log_data[key] = value
     
-    performance_logger.info(json.dumps(log_data, ensure_ascii=False))
+    performance_logger.info(
+        "performance: operation=%s duration_ms=%s success=%s",
+        operation, duration_ms, success,
+        extra=log_data
+    )
 
 
 def log_security_event(
@@ -222,16 +264,24 @@ def log_security_event(
 ):
     """セキュリティイベントをログに記録"""
     logger = logging.getLogger(__name__)
+    if not logger.isEnabledFor(logging.INFO if success else logging.WARNING):
+        return
     
-    message = f"SECURITY: {event_type}"
-    if user_id:
-        message += f", user_id={user_id}"
-    if ip_address:
-        message += f", ip={ip_address}"
-    if details:
-        message += f", details={details}"
+    message = "SECURITY: %s"
+    args = [event_type]
+    for label, value in (("user_id", user_id), ("ip", ip_address), ("details", details)):
+        if value:
+            message += f", {label}=%s"
+            args.append(value)
+    
+    extra = {
+        "security_event": event_type,
+        "user_id": user_id,
+        "ip_address": ip_address,
+        "success": success,
+    }
     
     if success:
-        logger.info(message)
+        logger.info(message, *args, extra=extra)
     else:
-        logger.warning(message)
\ No newline at end of file
+        logger.warning(message, *args, extra=extra)
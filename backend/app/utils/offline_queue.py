@@ -9,7 +9,7 @@ import logging
 import os
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Sequence
 from threading import Lock, Thread, Event
 from pathlib import Path
 import sqlite3
@@ -23,6 +23,23 @@ from slack_sdk.errors import SlackApiError
 
 logger = logging.getLogger(__name__)
 
+# offline_punches テーブルの列（get_pending_punches の columns 指定で許可する列名）
+_PUNCH_COLUMNS = (
+    "id", "employee_id", "punch_type", "card_idm_hash", "timestamp",
+    "device_type", "ip_address", "location_lat", "location_lon", "note",
+    "created_at", "retry_count", "last_retry_at", "error_message", "data_hash",
+)
+
+# 同期コールバックに渡す列（打刻内容のみ。リトライ管理用の列は hydrate_punch で取得する）
+_SYNC_COLUMNS = (
+    "id", "employee_id", "punch_type", "card_idm_hash", "timestamp",
+    "device_type", "ip_address", "location_lat", "location_lon", "note",
+)
+
+
+def _skip_slack_notification(message: str) -> None:
+    """Slack未設定時の通知処理（何もしない）"""
+
 
 class OfflineQueueManager:
     """オフライン打刻キュー管理クラス"""
@@ -45,6 +62,7 @@ class OfflineQueueManager:
         self.stop_event = Event()
         self.is_running = False
         self.slack_client = None
+        self._last_notification_time = None
         
         # Slack通知の設定
         if hasattr(config, 'SLACK_ENABLED') and config.SLACK_ENABLED and hasattr(config, 'SLACK_TOKEN') and config.SLACK_TOKEN:
@@ -71,6 +89,14 @@ class OfflineQueueManager:
         base_path.mkdir(exist_ok=True)
         return str(base_path / "offline_queue.db")
     
+    def _connect(self) -> sqlite3.Connection:
+        """SQLite接続を取得（``file:`` 形式のURIパスにも対応）"""
+        conn = sqlite3.connect(self.db_path, uri=self.db_path.startswith("file:"))
+        # WALモードではNORMALでもクラッシュ耐性を保ちつつコミット毎のfsyncを削減できる
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
     def _ensure_database_ready(self):
         """データベースの確実な準備"""
         try:
@@ -94,7 +120,7 @@ class OfflineQueueManager:
         
         # データベースファイルの確実な作成
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.execute("SELECT 1")  # 接続テスト
         except sqlite3.OperationalError:
             if self.db_path != ":memory:":
@@ -106,7 +132,9 @@ class OfflineQueueManager:
                     logger.error(f"Failed to create database file: {e}")
                     raise
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
+            # WALモード（データベースファイルに永続化される）
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS offline_punches (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -145,57 +173,76 @@ class OfflineQueueManager:
         Args:
             punch_data: 打刻データ
         
+        Returns:
+            bool: 成功/失敗
+        """
+        return self.add_punches([punch_data])
+    
+    def add_punches(self, punches: Iterable[Dict[str, Any]]) -> bool:
+        """
+        複数の打刻データを1トランザクションでキューに追加
+        
+        Args:
+            punches: 打刻データのイテラブル
+        
         Returns:
             bool: 成功/失敗
         """
         try:
-            # データハッシュを生成（重複防止）
-            data_hash = self._generate_data_hash(punch_data)
+            created_at = datetime.now().isoformat()
+            rows = []
+            for punch_data in punches:
+                location = punch_data.get('location', {})
+                rows.append((
+                    punch_data.get('employee_id'),
+                    punch_data.get('punch_type'),
+                    punch_data.get('card_idm'),
+                    punch_data.get('timestamp'),
+                    punch_data.get('device_type'),
+                    punch_data.get('ip_address'),
+                    location.get('latitude'),
+                    location.get('longitude'),
+                    punch_data.get('note'),
+                    created_at,
+                    # データハッシュを生成（重複防止）
+                    self._generate_data_hash(punch_data)
+                ))
+            
+            if not rows:
+                return True
             
             with self.db_lock:
-                with sqlite3.connect(self.db_path) as conn:
+                with self._connect() as conn:
+                    # データ挿入
+                    conn.executemany("""
+                        INSERT OR IGNORE INTO offline_punches (
+                            employee_id, punch_type, card_idm_hash,
+                            timestamp, device_type, ip_address,
+                            location_lat, location_lon, note,
+                            created_at, data_hash
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, rows)
+                    
                     # キューサイズチェック
                     count = conn.execute(
                         "SELECT COUNT(*) FROM offline_punches"
                     ).fetchone()[0]
                     
-                    if count >= self.MAX_QUEUE_SIZE:
-                        # 最も古いレコードを削除
+                    if count > self.MAX_QUEUE_SIZE:
+                        # 最も古いレコードから超過分を削除
                         conn.execute("""
                             DELETE FROM offline_punches 
                             WHERE id IN (
                                 SELECT id FROM offline_punches 
-                                ORDER BY created_at ASC 
-                                LIMIT 1
+                                ORDER BY created_at ASC, id ASC 
+                                LIMIT ?
                             )
-                        """)
+                        """, (count - self.MAX_QUEUE_SIZE,))
                         logger.warning("オフラインキューが満杯のため、最古のレコードを削除しました")
                     
-                    # データ挿入
-                    conn.execute("""
-                        INSERT OR IGNORE INTO offline_punches (
-                            employee_id, punch_type, card_idm_hash,
-                            timestamp, device_type, ip_address,
-                            location_lat, location_lon, note,
-                            created_at, data_hash
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        punch_data.get('employee_id'),
-                        punch_data.get('punch_type'),
-                        punch_data.get('card_idm'),
-                        punch_data.get('timestamp'),
-                        punch_data.get('device_type'),
-                        punch_data.get('ip_address'),
-                        punch_data.get('location', {}).get('latitude'),
-                        punch_data.get('location', {}).get('longitude'),
-                        punch_data.get('note'),
-                        datetime.now().isoformat(),
-                        data_hash
-                    ))
-                    
                     conn.commit()
                     
-                    logger.info(f"オフライン打刻をキューに追加: {data_hash[:8]}...")
+                    logger.info("オフライン打刻をキューに追加: %s件", len(rows))
                     return True
                     
         except sqlite3.IntegrityError:
@@ -211,24 +258,43 @@ class OfflineQueueManager:
         hash_source = f"{punch_data.get('card_idm')}:{punch_data.get('timestamp')}"
         return hashlib.sha256(hash_source.encode()).hexdigest()
     
-    def get_pending_punches(self, limit: int = None) -> List[Dict[str, Any]]:
+    def get_pending_punches(
+        self,
+        limit: int = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
         """
         保留中の打刻データを取得
         
         Args:
             limit: 取得件数制限
+            columns: 取得する列名（省略時は全列）。
+                同期処理に必要な列だけを取得し、残りは hydrate_punch で必要時に取得する
         
         Returns:
             List[Dict[str, Any]]: 打刻データリスト
+        
+        Raises:
+            ValueError: 列名が空、または未知の列名が指定された場合
         """
         if limit is None:
             limit = self.BATCH_SIZE
         
+        if columns is None:
+            select_list = "*"
+        else:
+            if not columns:
+                raise ValueError("取得する列名が指定されていません")
+            unknown = [column for column in columns if column not in _PUNCH_COLUMNS]
+            if unknown:
+                raise ValueError(f"未知の列名です: {', '.join(unknown)}")
+            select_list = ", ".join(columns)
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
-                rows = conn.execute("""
-                    SELECT * FROM offline_punches 
+                rows = conn.execute(f"""
+                    SELECT {select_list} FROM offline_punches 
                     WHERE retry_count < 5
                     ORDER BY created_at ASC 
                     LIMIT ?
@@ -239,6 +305,31 @@ class OfflineQueueManager:
             logger.error(f"保留中の打刻データ取得エラー: {e}")
             return []
     
+    def hydrate_punch(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """
+        打刻データの全列を取得
+        
+        get_pending_punches を columns 指定で呼んだ後、
+        上位システムへ送信する直前に残りの列を補完するために使う。
+        
+        Args:
+            record_id: レコードID
+        
+        Returns:
+            Optional[Dict[str, Any]]: 打刻データ（存在しない場合None）
+        """
+        try:
+            with self._connect() as conn:
+                conn.row_factory = sqlite3.Row
+                row = conn.execute(
+                    "SELECT * FROM offline_punches WHERE id = ?",
+                    (record_id,)
+                ).fetchone()
+                return dict(row) if row else None
+        except Exception as e:
+            logger.error("打刻データ取得エラー: %s", e)
+            return None
+    
     def mark_as_synced(self, record_id: int) -> bool:
         """
         レコードを同期済みとしてマーク（削除）
@@ -251,7 +342,7 @@ class OfflineQueueManager:
         """
         try:
             with self.db_lock:
-                with sqlite3.connect(self.db_path) as conn:
+                with self._connect() as conn:
                     conn.execute(
                         "DELETE FROM offline_punches WHERE id = ?",
                         (record_id,)
@@ -275,7 +366,7 @@ class OfflineQueueManager:
         """
         try:
             with self.db_lock:
-                with sqlite3.connect(self.db_path) as conn:
+                with self._connect() as conn:
                     conn.execute("""
                         UPDATE offline_punches 
                         SET retry_count = retry_count + 1,
@@ -295,7 +386,7 @@ class OfflineQueueManager:
             cutoff_date = (datetime.now() - timedelta(days=self.RETENTION_DAYS)).isoformat()
             
             with self.db_lock:
-                with sqlite3.connect(self.db_path) as conn:
+                with self._connect() as conn:
                     deleted = conn.execute("""
                         DELETE FROM offline_punches 
                         WHERE created_at < ?
@@ -308,12 +399,67 @@ class OfflineQueueManager:
         except Exception as e:
             logger.error(f"クリーンアップエラー: {e}")
     
+    def _run_sync_once(self, sync_callback):
+        """
+        保留中の打刻を1回分同期
+        
+        Args:
+            sync_callback: 同期処理のコールバック関数
+        """
+        try:
+            # 保留中の打刻を取得（コールバックに必要な列のみ）
+            pending_punches = self.get_pending_punches(columns=_SYNC_COLUMNS)
+            
+            if pending_punches:
+                logger.info(f"{len(pending_punches)}件のオフライン打刻を同期します")
+                
+                success_count = 0
+                for punch in pending_punches:
+                    try:
+                        # コールバックで同期を試行
+                        if sync_callback(punch):
+                            self.mark_as_synced(punch['id'])
+                            success_count += 1
+                        else:
+                            self.update_retry_status(
+                                punch['id'], 
+                                "同期コールバックが失敗を返しました"
+                            )
+                            
+                    except Exception as e:
+                        error_msg = f"同期エラー: {str(e)}"
+                        logger.error(error_msg)
+                        self.update_retry_status(punch['id'], error_msg)
+                
+                if success_count > 0:
+                    logger.info(f"{success_count}件の同期に成功しました")
+                
+                # 失敗が続く場合はSlack通知
+                failed_count = len(pending_punches) - success_count
+                if failed_count > 5:
+                    current_time = datetime.now()
+                    if (self._last_notification_time is None or 
+                        current_time - self._last_notification_time > timedelta(hours=1)):
+                        self._send_slack_notification(
+                            f"⚠️ オフライン打刻の同期エラー\n"
+                            f"{failed_count}件の打刻データが同期できません。"
+                        )
+                        self._last_notification_time = current_time
+            
+            # 定期的なクリーンアップ
+            if time.time() % 3600 < self.SYNC_INTERVAL:  # 1時間ごと
+                self._cleanup_old_records()
+            
+        except Exception as e:
+            logger.error(f"同期ループエラー: {e}")
+    
     def start_sync_thread(self, sync_callback):
         """
         同期スレッドを開始
         
         Args:
-            sync_callback: 同期処理のコールバック関数
+            sync_callback: 同期処理のコールバック関数。
+                打刻内容の列（_SYNC_COLUMNS）だけを持つ dict を受け取る
         """
         if self.is_running:
             logger.warning("同期スレッドは既に実行中です")
@@ -324,55 +470,9 @@ class OfflineQueueManager:
         
         def sync_loop():
             logger.info("オフライン同期スレッドを開始しました")
-            last_notification_time = None
             
             while self.is_running and not self.stop_event.is_set():
-                try:
-                    # 保留中の打刻を取得
-                    pending_punches = self.get_pending_punches()
-                    
-                    if pending_punches:
-                        logger.info(f"{len(pending_punches)}件のオフライン打刻を同期します")
-                        
-                        success_count = 0
-                        for punch in pending_punches:
-                            try:
-                                # コールバックで同期を試行
-                                if sync_callback(punch):
-                                    self.mark_as_synced(punch['id'])
-                                    success_count += 1
-                                else:
-                                    self.update_retry_status(
-                                        punch['id'], 
-                                        "同期コールバックが失敗を返しました"
-                                    )
-                                    
-                            except Exception as e:
-                                error_msg = f"同期エラー: {str(e)}"
-                                logger.error(error_msg)
-                                self.update_retry_status(punch['id'], error_msg)
-                        
-                        if success_count > 0:
-                            logger.info(f"{success_count}件の同期に成功しました")
-                        
-                        # 失敗が続く場合はSlack通知
-                        failed_count = len(pending_punches) - success_count
-                        if failed_count > 5:
-                            current_time = datetime.now()
-                            if (last_notification_time is None or 
-                                current_time - last_notification_time > timedelta(hours=1)):
-                                self._send_slack_notification(
-                                    f"⚠️ オフライン打刻の同期エラー\n"
-                                    f"{failed_count}件の打刻データが同期できません。"
-                                )
-                                last_notification_time = current_time
-                    
-                    # 定期的なクリーンアップ
-                    if time.time() % 3600 < self.SYNC_INTERVAL:  # 1時間ごと
-                        self._cleanup_old_records()
-                    
-                except Exception as e:
-                    logger.error(f"同期ループエラー: {e}")
+                self._run_sync_once(sync_callback)
                 
                 # 次回同期まで待機
                 self.stop_event.wait(self.SYNC_INTERVAL)
@@ -396,11 +496,26 @@ class OfflineQueueManager:
             if self.sync_thread.is_alive():
                 logger.warning("同期スレッドの停止がタイムアウトしました")
     
-    def _send_slack_notification(self, message: str):
-        """Slack通知を送信"""
-        if not self.slack_client:
-            return
+    @property
+    def slack_client(self) -> Optional[WebClient]:
+        """Slackクライアント（未設定時は None）"""
+        return self._slack_client
+    
+    @slack_client.setter
+    def slack_client(self, client: Optional[WebClient]):
+        """
+        Slackクライアントを設定し、通知の送信処理を束縛し直す
         
+        未設定時（通常運用）は何もしない関数を束縛し、同期失敗のたびの判定を省く。
+        """
+        self._slack_client = client
+        if client:
+            self._send_slack_notification = self._slack_send_impl
+        else:
+            self._send_slack_notification = _skip_slack_notification
+    
+    def _slack_send_impl(self, message: str):
+        """Slack通知を送信"""
         try:
             self.slack_client.chat_postMessage(
                 channel=config.SLACK_CHANNEL,
@@ -412,7 +527,7 @@ class OfflineQueueManager:
     def get_stats(self) -> Dict[str, Any]:
         """統計情報を取得"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 total = conn.execute(
                     "SELECT COUNT(*) FROM offline_punches"
                 ).fetchone()[0]
@@ -41,23 +41,24 @@ STATUS_MAP: Dict[str, str] = {
 }
 
 
-def _field_value(punch: Any) -> Any:
-    """Enum/文字列の両方を扱えるようにする"""
-    value = getattr(punch, "punch_type", punch)
-    return value.value if isinstance(value, Enum) else value
+# 判定用の値集合（Enum・文字列のどちらでも1回のハッシュ照合で判定できる）
+_IN_VALUES = frozenset({PunchType.IN, PunchType.IN.value})
+_OUT_VALUES = frozenset({PunchType.OUT, PunchType.OUT.value})
+_OUTSIDE_VALUES = frozenset({PunchType.OUTSIDE, PunchType.OUTSIDE.value})
+_RETURN_VALUES = frozenset({PunchType.RETURN, PunchType.RETURN.value})
 
 
 def is_in(punch: Any) -> bool:
-    return _field_value(punch) == PunchType.IN.value
+    return getattr(punch, "punch_type", punch) in _IN_VALUES
 
 
 def is_out(punch: Any) -> bool:
-    return _field_value(punch) == PunchType.OUT.value
+    return getattr(punch, "punch_type", punch) in _OUT_VALUES
 
 
 def is_outside(punch: Any) -> bool:
-    return _field_value(punch) == PunchType.OUTSIDE.value
+    return getattr(punch, "punch_type", punch) in _OUTSIDE_VALUES
 
 
 def is_return(punch: Any) -> bool:
-    return _field_value(punch) == PunchType.RETURN.value
+    return getattr(punch, "punch_type", punch) in _RETURN_VALUES
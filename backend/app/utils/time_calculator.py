@@ -4,12 +4,31 @@
 勤怠時間の計算、丸め処理、深夜時間の判定などを行う
 """
 
-from datetime import datetime, date, time, timedelta
-from typing import List, Dict, Any, Tuple, Optional
+from datetime import datetime, date, time
+from functools import lru_cache
+from typing import List, Dict, Tuple, Optional
+
+import numpy as np
+
 from backend.app.models import PunchRecord, PunchType
 from config.config import config
 
 
+# 打刻種別の整数コード（np.searchsorted で文字列配列を一括変換するためソート済み）
+_PUNCH_TYPE_VALUES = np.array(sorted(punch_type.value for punch_type in PunchType))
+_CODE_IN, _CODE_OUT, _CODE_OUTSIDE, _CODE_RETURN = (
+    int(np.searchsorted(_PUNCH_TYPE_VALUES, punch_type.value))
+    for punch_type in (PunchType.IN, PunchType.OUT, PunchType.OUTSIDE, PunchType.RETURN)
+)
+
+_SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def _seconds_of_day(value: time) -> int:
+    """時刻を0時からの秒数に変換"""
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
 class TimeCalculator:
     """時間計算クラス"""
     
@@ -28,137 +47,160 @@ class TimeCalculator:
         Returns:
             Dict[str, int]: 各種時間（分単位）
         """
-        result = {
-            "work_minutes": 0,
-            "overtime_minutes": 0,
-            "night_minutes": 0,
-            "outside_minutes": 0,
-            "break_minutes": 0,
-            "actual_work_minutes": 0
-        }
-        
         if not punches:
-            return result
+            return {
+                "work_minutes": 0,
+                "overtime_minutes": 0,
+                "night_minutes": 0,
+                "outside_minutes": 0,
+                "break_minutes": 0,
+                "actual_work_minutes": 0
+            }
+        
+        punch_times = np.array(
+            [punch.punch_time for punch in punches], dtype="datetime64[s]"
+        )
+        punch_types = np.array(
+            [getattr(punch.punch_type, "value", punch.punch_type) for punch in punches]
+        )
+        batch = self.calculate_daily_hours_batch(punch_times, punch_types)
+        return {key: int(values[0]) for key, values in batch.items()}
+    
+    def calculate_daily_hours_batch(
+        self,
+        punch_times: np.ndarray,
+        punch_types: np.ndarray,
+        group_ids: Optional[np.ndarray] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        複数の勤務日の労働時間をまとめて計算
+        
+        月次締めなどで社員×日単位の計算を一括で行うため、
+        打刻をnumpy配列として受け取りベクトル演算で集計する。
+        
+        Args:
+            punch_times: 打刻時刻の配列（datetime64）
+            punch_types: 打刻種別（PunchTypeの値）の配列
+            group_ids: 勤務日（社員×日）を識別するIDの配列。省略時は全体を1日として扱う
+            now: 未退勤・未戻りの計算に使う現在時刻（省略時は datetime.now()）
+        
+        Returns:
+            Dict[str, np.ndarray]: 各種時間（分単位）。
+                要素は np.unique(group_ids) の順に並ぶ
+        """
+        times = np.asarray(punch_times, dtype="datetime64[s]").astype(np.int64)
+        types = np.asarray(punch_types).astype(str)
+        if group_ids is None:
+            groups = np.zeros(len(times), dtype=np.int64)
+            n_groups = 1
+        else:
+            _, groups = np.unique(np.asarray(group_ids), return_inverse=True)
+            n_groups = int(groups.max()) + 1 if len(groups) else 0
         
-        # 出退勤時刻を特定
-        clock_in = None
-        clock_out = None
-        breaks = []
-        
-        for punch in punches:
-            if punch.punch_type == PunchType.IN.value and not clock_in:
-                clock_in = punch
-            elif punch.punch_type == PunchType.OUT.value:
-                clock_out = punch
-            elif punch.punch_type == PunchType.OUTSIDE.value:
-                breaks.append({"start": punch, "end": None})
-            elif punch.punch_type == PunchType.RETURN.value and breaks:
-                for break_period in reversed(breaks):
-                    if break_period["end"] is None:
-                        break_period["end"] = punch
-                        break
-        
-        if not clock_in:
+        zeros = np.zeros(n_groups, dtype=np.int64)
+        result = {
+            "work_minutes": zeros.copy(),
+            "overtime_minutes": zeros.copy(),
+            "night_minutes": zeros.copy(),
+            "outside_minutes": zeros.copy(),
+            "break_minutes": zeros.copy(),
+            "actual_work_minutes": zeros.copy()
+        }
+        if len(times) == 0:
             return result
         
-        # 勤務終了時刻（退勤打刻がない場合は現在時刻）
-        end_time = clock_out.punch_time if clock_out else datetime.now()
-        
-        # 総労働時間
-        work_duration = end_time - clock_in.punch_time
-        result["work_minutes"] = int(work_duration.total_seconds() / 60)
-        
-        # 休憩時間を計算
-        for break_period in breaks:
-            if break_period["start"] and break_period["end"]:
-                break_duration = break_period["end"].punch_time - break_period["start"].punch_time
-                result["break_minutes"] += int(break_duration.total_seconds() / 60)
-            elif break_period["start"] and not break_period["end"]:
-                # 未完了の外出は現在時刻まで
-                break_duration = datetime.now() - break_period["start"].punch_time
-                result["outside_minutes"] += int(break_duration.total_seconds() / 60)
-        
-        # 実労働時間
-        result["actual_work_minutes"] = result["work_minutes"] - result["break_minutes"]
-        
-        # 深夜労働時間を計算
-        result["night_minutes"] = self._calculate_night_minutes(
-            clock_in.punch_time, 
-            end_time,
-            breaks
+        # 勤務日・時刻順に並べ替え
+        order = np.lexsort((times, groups))
+        times, types, groups = times[order], types[order], groups[order]
+        
+        # 打刻種別を整数コードに変換（未知の種別は -1）
+        codes = np.searchsorted(_PUNCH_TYPE_VALUES, types)
+        known = _PUNCH_TYPE_VALUES[np.minimum(codes, len(_PUNCH_TYPE_VALUES) - 1)] == types
+        codes = np.where(known, codes, -1)
+        
+        now_ts = np.datetime64(now or datetime.now(), "s").astype(np.int64)
+        int64_max = np.iinfo(np.int64).max
+        int64_min = np.iinfo(np.int64).min
+        
+        # 出勤（最初のIN）と退勤（最後のOUT、未退勤なら現在時刻）
+        clock_in = np.full(n_groups, int64_max, dtype=np.int64)
+        np.minimum.at(clock_in, groups[codes == _CODE_IN], times[codes == _CODE_IN])
+        clock_out = np.full(n_groups, int64_min, dtype=np.int64)
+        np.maximum.at(clock_out, groups[codes == _CODE_OUT], times[codes == _CODE_OUT])
+        has_in = clock_in != int64_max
+        end = np.where(clock_out != int64_min, clock_out, now_ts)
+        
+        # 外出（OUTSIDE）直後の打刻が同じ勤務日のRETURNなら休憩、そうでなければ未完了の外出
+        is_outside = codes == _CODE_OUTSIDE
+        closed = np.zeros(len(times), dtype=bool)
+        closed[:-1] = (
+            is_outside[:-1]
+            & (codes[1:] == _CODE_RETURN)
+            & (groups[1:] == groups[:-1])
         )
+        break_start = times[closed]
+        break_end = times[np.flatnonzero(closed) + 1]
+        break_minutes = zeros.copy()
+        np.add.at(break_minutes, groups[closed], (break_end - break_start) // 60)
+        
+        open_outside = is_outside & ~closed
+        outside_minutes = zeros.copy()
+        np.add.at(outside_minutes, groups[open_outside], (now_ts - times[open_outside]) // 60)
+        
+        # 深夜時間: 勤務時間帯の深夜分から休憩中の深夜分を差し引く
+        start = np.where(has_in, clock_in, 0)
+        night_seconds = self._night_seconds_until(end) - self._night_seconds_until(start)
+        break_night = zeros.copy()
+        np.add.at(
+            break_night,
+            groups[closed],
+            self._night_seconds_until(break_end) - self._night_seconds_until(break_start)
+        )
+        night_minutes = np.maximum(night_seconds // 60 - break_night // 60, 0)
+        
+        work_minutes = (end - start) // 60
+        actual_work_minutes = work_minutes - break_minutes
         
         # 残業時間（8時間超過分）
         standard_minutes = self.standard_work_hours * 60
-        if result["actual_work_minutes"] > standard_minutes:
-            result["overtime_minutes"] = result["actual_work_minutes"] - standard_minutes
-        
-        # 日次丸め処理
-        result["actual_work_minutes"] = self.round_daily_minutes(result["actual_work_minutes"])
-        result["overtime_minutes"] = self.round_daily_minutes(result["overtime_minutes"])
-        
+        overtime_minutes = np.maximum(actual_work_minutes - standard_minutes, 0)
+        
+        # 日次丸め処理（15分単位）
+        result["work_minutes"] = np.where(has_in, work_minutes, 0)
+        result["break_minutes"] = np.where(has_in, break_minutes, 0)
+        result["outside_minutes"] = np.where(has_in, outside_minutes, 0)
+        result["night_minutes"] = np.where(has_in, night_minutes, 0)
+        result["actual_work_minutes"] = np.where(
+            has_in, self._round_minutes_array(actual_work_minutes), 0
+        )
+        result["overtime_minutes"] = np.where(
+            has_in, self._round_minutes_array(overtime_minutes), 0
+        )
         return result
     
-    def _calculate_night_minutes(
-        self, 
-        start: datetime, 
-        end: datetime,
-        breaks: List[Dict[str, Any]]
-    ) -> int:
+    def _night_seconds_until(self, timestamps: np.ndarray) -> np.ndarray:
         """
-        深夜労働時間を計算
-        
-        Args:
-            start: 開始時刻
-            end: 終了時刻
-            breaks: 休憩リスト
+        エポックから各時刻までに含まれる深夜時間帯（night_start-night_end）の累積秒数
         
-        Returns:
-            int: 深夜労働時間（分）
+        区間 [start, end) の深夜時間は f(end) - f(start) で求められる。
+        深夜帯は日付をまたぐ（night_start > night_end）前提。
         """
-        night_minutes = 0
-        current = start
-        
-        while current < end:
-            next_day = current.date() + timedelta(days=1)
-            
-            # 当日の深夜時間帯（22:00-24:00）
-            night_start_today = datetime.combine(current.date(), self.night_start)
-            night_end_today = datetime.combine(next_day, time(0, 0))
-            
-            # 翌日の深夜時間帯（00:00-05:00）
-            night_start_tomorrow = datetime.combine(next_day, time(0, 0))
-            night_end_tomorrow = datetime.combine(next_day, self.night_end)
-            
-            # 当日の深夜労働
-            if current < night_end_today:
-                overlap_start = max(current, night_start_today)
-                overlap_end = min(end, night_end_today)
-                if overlap_start < overlap_end:
-                    duration = overlap_end - overlap_start
-                    night_minutes += int(duration.total_seconds() / 60)
-            
-            # 翌日早朝の深夜労働
-            if end > night_start_tomorrow:
-                overlap_start = max(current, night_start_tomorrow)
-                overlap_end = min(end, night_end_tomorrow)
-                if overlap_start < overlap_end:
-                    duration = overlap_end - overlap_start
-                    night_minutes += int(duration.total_seconds() / 60)
-            
-            current = night_end_tomorrow
-        
-        # 休憩時間を除外
-        for break_period in breaks:
-            if break_period["start"] and break_period["end"]:
-                break_night = self._calculate_night_minutes(
-                    break_period["start"].punch_time,
-                    break_period["end"].punch_time,
-                    []
-                )
-                night_minutes -= break_night
-        
-        return max(0, night_minutes)
+        morning_end = _seconds_of_day(self.night_end)
+        evening_start = _seconds_of_day(self.night_start)
+        night_seconds_per_day = morning_end + (_SECONDS_PER_DAY - evening_start)
+        
+        days, seconds = np.divmod(timestamps, _SECONDS_PER_DAY)
+        return (
+            days * night_seconds_per_day
+            + np.minimum(seconds, morning_end)
+            + np.maximum(seconds - evening_start, 0)
+        )
+    
+    @staticmethod
+    def _round_minutes_array(minutes: np.ndarray) -> np.ndarray:
+        """round_daily_minutes と同じ15分単位の丸め（配列版）"""
+        return (np.round(minutes / 15) * 15).astype(np.int64)
     
     def round_daily_minutes(self, minutes: int) -> int:
         """
@@ -190,10 +232,15 @@ class TimeCalculator:
         else:
             return (hours + 1) * 60
     
-    def is_holiday(self, target_date: date) -> bool:
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def is_holiday(target_date: date) -> bool:
         """
         休日判定（簡易版：土日のみ）
         
+        月次締めで社員ごとに同じ日付が繰り返し判定されるため結果をキャッシュする。
+        祝日カレンダーを差し替える場合は ``TimeCalculator.is_holiday.cache_clear()`` を呼ぶこと。
+        
         Args:
             target_date: 判定対象日
         
@@ -213,10 +260,11 @@ class TimeCalculator:
         Returns:
             int: 所定労働時間（分）
         """
+        # 休日判定はキャッシュ済みの is_holiday に任せる（サブクラスの上書きも反映される）
         if self.is_holiday(target_date):
             return 0
         
-        # 通常は8時間
+        # 通常は標準労働時間（8時間）
         return self.standard_work_hours * 60
     
     def calculate_late_minutes(
@@ -260,3 +308,4 @@ class TimeCalculator:
             early_duration = scheduled - actual_end
             return int(early_duration.total_seconds() / 60)
         return 0
+
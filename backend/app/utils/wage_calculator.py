@@ -4,11 +4,18 @@
 基本給、残業代、深夜手当などの賃金計算を行う
 """
 
-from decimal import Decimal, ROUND_DOWN
-from typing import Dict, Any, Optional
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Sequence
 from datetime import date
 
+import numpy as np
+
 from backend.app.models import Employee, WageType
+from backend.app.utils._wage_kernels import (
+    daily_wage_kernel,
+    floor_to_unit,
+    overtime_wage_kernel,
+)
 from config.config import config
 
 
@@ -22,6 +29,7 @@ class WageCalculator:
         self.holiday_rate = Decimal("1.35")             # 休日労働割増率（135%）
         self.overtime_threshold = 60                     # 月60時間超で割増率変更
         self.standard_monthly_hours = 160                # 月間標準労働時間
+        self.deduction_rate = Decimal("0.20")           # 控除率（簡易版）
     
     def calculate_daily_wage(
         self,
@@ -45,40 +53,31 @@ class WageCalculator:
             Dict[str, float]: 賃金計算結果
         """
         # 時給を計算
-        hourly_rate = self._calculate_hourly_rate(employee)
+        hourly_rate = float(self._calculate_hourly_rate(employee))
         
         # 通常労働時間（残業を除く）
         regular_minutes = work_minutes - overtime_minutes
-        regular_hours = Decimal(regular_minutes) / 60
-        
-        # 各種時間を時間単位に変換
-        overtime_hours = Decimal(overtime_minutes) / 60
-        night_hours = Decimal(night_minutes) / 60
-        holiday_hours = Decimal(holiday_minutes) / 60
-        
-        # 基本給
-        basic_wage = hourly_rate * regular_hours
-        
-        # 残業代
-        overtime_wage = hourly_rate * overtime_hours * self.overtime_rate_normal
-        
-        # 深夜手当
-        night_wage = hourly_rate * night_hours * (self.night_rate - 1)
-        
-        # 休日手当
-        holiday_wage = hourly_rate * holiday_hours * self.holiday_rate
         
-        # 合計
-        total_wage = basic_wage + overtime_wage + night_wage + holiday_wage
+        # 基本給・残業代・深夜手当・休日手当・合計（float64で計算し、最後に銭単位で切り捨て）
+        basic_wage, overtime_wage, night_wage, _, total_wage = daily_wage_kernel(
+            hourly_rate,
+            regular_minutes,
+            overtime_minutes,
+            night_minutes,
+            holiday_minutes,
+            float(self.overtime_rate_normal),
+            float(self.night_rate),
+            float(self.holiday_rate)
+        )
         
         return {
-            "regular_hours": float(regular_hours),
-            "overtime_hours": float(overtime_hours),
-            "night_hours": float(night_hours),
-            "basic_wage": float(basic_wage.quantize(Decimal("0.01"), rounding=ROUND_DOWN)),
-            "overtime_wage": float(overtime_wage.quantize(Decimal("0.01"), rounding=ROUND_DOWN)),
-            "night_wage": float(night_wage.quantize(Decimal("0.01"), rounding=ROUND_DOWN)),
-            "total_wage": float(total_wage.quantize(Decimal("0.01"), rounding=ROUND_DOWN))
+            "regular_hours": regular_minutes / 60,
+            "overtime_hours": overtime_minutes / 60,
+            "night_hours": night_minutes / 60,
+            "basic_wage": float(floor_to_unit(basic_wage, 0.01)),
+            "overtime_wage": float(floor_to_unit(overtime_wage, 0.01)),
+            "night_wage": float(floor_to_unit(night_wage, 0.01)),
+            "total_wage": float(floor_to_unit(total_wage, 0.01))
         }
     
     def calculate_monthly_wage(
@@ -104,47 +103,108 @@ class WageCalculator:
         Returns:
             Dict[str, float]: 賃金計算結果
         """
-        if employee.wage_type == WageType.MONTHLY:
-            # 月給制の場合
-            basic_wage = self._to_decimal(employee.monthly_salary)
-            hourly_rate = basic_wage / self.standard_monthly_hours if basic_wage else Decimal("0")
-        else:
-            # 時給制の場合
-            hourly_rate = self._calculate_hourly_rate(employee)
-            regular_hours = Decimal(str(total_work_hours - total_overtime_hours))
-            basic_wage = hourly_rate * regular_hours
+        summary = {
+            "total_work_hours": total_work_hours,
+            "overtime_hours": total_overtime_hours,
+            "night_hours": total_night_hours,
+            "holiday_hours": total_holiday_hours,
+            "monthly_overtime_minutes": monthly_overtime_minutes
+        }
+        return self.calculate_payroll_batch([employee], [summary])[0]
+    
+    def calculate_payroll_batch(
+        self,
+        employees: Sequence[Employee],
+        summaries: Sequence[Dict[str, Any]]
+    ) -> List[Dict[str, float]]:
+        """
+        複数従業員の月次賃金をまとめて計算
         
-        # 残業代（60時間超は割増率変更）
-        overtime_wage = self._calculate_overtime_with_threshold(
-            hourly_rate,
-            total_overtime_hours,
-            monthly_overtime_minutes
-        )
+        従業員ごとの時給・時間を float64 配列に並べ、配列演算で一括計算する。
         
-        # 深夜手当
-        night_wage = hourly_rate * Decimal(str(total_night_hours)) * (self.night_rate - 1)
+        Args:
+            employees: 従業員リスト
+            summaries: 従業員と同順の月次集計データ
+                （total_work_hours, overtime_hours, night_hours, holiday_hours,
+                monthly_overtime_minutes）
         
-        # 休日手当
-        holiday_wage = hourly_rate * Decimal(str(total_holiday_hours)) * self.holiday_rate
+        Returns:
+            List[Dict[str, float]]: 従業員ごとの賃金計算結果（calculate_monthly_wage と同形式）
+        """
+        if len(employees) != len(summaries):
+            raise ValueError("employees と summaries の件数が一致しません")
         
-        # 総支給額
-        total_wage = basic_wage + overtime_wage + night_wage + holiday_wage
+        n = len(employees)
         
-        # 控除（簡易版）
-        deductions = self._calculate_deductions(total_wage)
+        def column(key: str) -> np.ndarray:
+            return np.fromiter(
+                (float(summary.get(key) or 0) for summary in summaries),
+                dtype=np.float64,
+                count=n
+            )
         
-        # 手取り額
+        work_hours = column("total_work_hours")
+        overtime_hours = column("overtime_hours")
+        night_hours = column("night_hours")
+        holiday_hours = column("holiday_hours")
+        monthly_overtime_minutes = column("monthly_overtime_minutes")
+        
+        hourly_rates = np.fromiter(
+            (float(self._calculate_hourly_rate(employee)) for employee in employees),
+            dtype=np.float64,
+            count=n
+        )
+        is_monthly = np.fromiter(
+            (employee.wage_type == WageType.MONTHLY for employee in employees),
+            dtype=bool,
+            count=n
+        )
+        monthly_salaries = np.fromiter(
+            (float(self._to_decimal(getattr(employee, "monthly_salary", None)))
+             for employee in employees),
+            dtype=np.float64,
+            count=n
+        )
+        
+        # 基本給（月給制は月給そのもの、時給制は残業を除く労働時間分）
+        basic_wage = np.where(
+            is_monthly, monthly_salaries, hourly_rates * (work_hours - overtime_hours)
+        )
+        
+        # 残業代（月60時間超は超過分のみ割増率変更）
+        overtime_wage = overtime_wage_kernel(
+            hourly_rates,
+            overtime_hours,
+            monthly_overtime_minutes,
+            float(self.overtime_threshold),
+            float(self.overtime_rate_normal),
+            float(self.overtime_rate_heavy)
+        )
+        
+        # 深夜手当・休日手当
+        night_wage = hourly_rates * night_hours * float(self.night_rate - 1)
+        holiday_wage = hourly_rates * holiday_hours * float(self.holiday_rate)
+        
+        # 総支給額・控除（簡易版）・手取り額
+        total_wage = basic_wage + overtime_wage + night_wage + holiday_wage
+        deductions = total_wage * float(self.deduction_rate)
         net_wage = total_wage - deductions
         
-        return {
-            "basic_wage": float(basic_wage.quantize(Decimal("1"), rounding=ROUND_DOWN)),
-            "overtime_wage": float(overtime_wage.quantize(Decimal("1"), rounding=ROUND_DOWN)),
-            "night_wage": float(night_wage.quantize(Decimal("1"), rounding=ROUND_DOWN)),
-            "holiday_wage": float(holiday_wage.quantize(Decimal("1"), rounding=ROUND_DOWN)),
-            "total_wage": float(total_wage.quantize(Decimal("1"), rounding=ROUND_DOWN)),
-            "deductions": float(deductions.quantize(Decimal("1"), rounding=ROUND_DOWN)),
-            "net_wage": float(net_wage.quantize(Decimal("1"), rounding=ROUND_DOWN))
+        columns = {
+            "basic_wage": basic_wage,
+            "overtime_wage": overtime_wage,
+            "night_wage": night_wage,
+            "holiday_wage": holiday_wage,
+            "total_wage": total_wage,
+            "deductions": deductions,
+            "net_wage": net_wage
         }
+        # 円未満切り捨て
+        floored = {key: floor_to_unit(values, 1.0).tolist() for key, values in columns.items()}
+        return [
+            {key: values[i] for key, values in floored.items()}
+            for i in range(n)
+        ]
     
     def _calculate_hourly_rate(self, employee: Employee) -> Decimal:
         """
@@ -190,38 +250,15 @@ class WageCalculator:
         Returns:
             Decimal: 残業代
         """
-        overtime_wage = Decimal("0")
-        
-        if monthly_overtime_minutes <= self.overtime_threshold * 60:
-            # 60時間以内は通常の割増率
-            overtime_wage = hourly_rate * Decimal(str(total_overtime_hours)) * self.overtime_rate_normal
-        else:
-            # 60時間を超える場合
-            normal_hours = Decimal(str(self.overtime_threshold))
-            heavy_hours = Decimal(str(total_overtime_hours)) - normal_hours
-            
-            # 60時間までは1.25倍
-            overtime_wage += hourly_rate * normal_hours * self.overtime_rate_normal
-            
-            # 60時間超は1.5倍
-            if heavy_hours > 0:
-                overtime_wage += hourly_rate * heavy_hours * self.overtime_rate_heavy
-        
-        return overtime_wage
-    
-    def _calculate_deductions(self, total_wage: Decimal) -> Decimal:
-        """
-        控除額を計算（簡易版）
-        
-        Args:
-            total_wage: 総支給額
-        
-        Returns:
-            Decimal: 控除額
-        """
-        # TODO: 実際の社会保険料、税金計算の実装
-        # 簡易版として総支給額の20%を控除
-        return total_wage * Decimal("0.20")
+        overtime_wage = overtime_wage_kernel(
+            float(hourly_rate),
+            float(total_overtime_hours),
+            float(monthly_overtime_minutes),
+            float(self.overtime_threshold),
+            float(self.overtime_rate_normal),
+            float(self.overtime_rate_heavy)
+        )
+        return Decimal(repr(float(overtime_wage)))
     
     def calculate_payroll_entry(
         self,
@@ -10,6 +10,7 @@ High-performance WebSocket management for NFC scanning with:
 
 import asyncio
 import json
+import statistics
 import time
 import uvloop
 from typing import Dict, Set, List, Optional, Any
@@ -28,7 +29,12 @@ asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 
 class PerformanceMetrics:
-    """Performance metrics tracking"""
+    """Performance metrics tracking
+    
+    The summary built by get_metrics() is cached until the next record_* or
+    increment_* call. All methods are synchronous and the manager only calls
+    them from the event loop thread, so no lock is needed.
+    """
     
     def __init__(self, window_size: int = 1000):
         self.window_size = window_size
@@ -37,42 +43,85 @@ class PerformanceMetrics:
         self.error_counts = defaultdict(int)
         self.connection_times = deque(maxlen=window_size)
         self.last_reset = time.time()
+        self._dirty = True
+        self._cached: Optional[Dict[str, Any]] = None
     
     def record_response_time(self, duration: float):
         """Record response time in milliseconds"""
         self.response_times.append(duration * 1000)
+        self._dirty = True
     
     def record_connection_time(self, duration: float):
         """Record connection time in milliseconds"""
         self.connection_times.append(duration * 1000)
+        self._dirty = True
     
     def increment_message_count(self, message_type: str):
         """Increment message count by type"""
         self.message_counts[message_type] += 1
+        self._dirty = True
     
     def increment_error_count(self, error_type: str):
         """Increment error count by type"""
         self.error_counts[error_type] += 1
+        self._dirty = True
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get current metrics"""
-        response_times_list = list(self.response_times)
-        connection_times_list = list(self.connection_times)
+        if self._dirty or self._cached is None:
+            self._cached = self._summarize()
+            self._dirty = False
+        
+        # Copy the nested dicts too (their values are numbers), so callers that
+        # modify the result cannot corrupt the cached summary
+        metrics = {key: dict(value) for key, value in self._cached.items()}
+        # Uptime keeps moving even when no samples were recorded
+        metrics["uptime_seconds"] = time.time() - self.last_reset
+        return metrics
+    
+    def _summarize(self) -> Dict[str, Any]:
+        """Reduce the sample windows into the metrics summary"""
+        response_times_sorted = sorted(self.response_times)
+        count = len(response_times_sorted)
         
         return {
             "response_time": {
-                "avg": sum(response_times_list) / len(response_times_list) if response_times_list else 0,
-                "min": min(response_times_list) if response_times_list else 0,
-                "max": max(response_times_list) if response_times_list else 0,
-                "p95": sorted(response_times_list)[int(len(response_times_list) * 0.95)] if len(response_times_list) > 1 else 0,
-                "p99": sorted(response_times_list)[int(len(response_times_list) * 0.99)] if len(response_times_list) > 1 else 0,
+                "avg": statistics.fmean(response_times_sorted) if count else 0,
+                "min": response_times_sorted[0] if count else 0,
+                "max": response_times_sorted[-1] if count else 0,
+                "p95": response_times_sorted[int(count * 0.95)] if count > 1 else 0,
+                "p99": response_times_sorted[int(count * 0.99)] if count > 1 else 0,
             },
             "connection_time": {
-                "avg": sum(connection_times_list) / len(connection_times_list) if connection_times_list else 0,
+                "avg": statistics.fmean(self.connection_times) if self.connection_times else 0,
             },
             "message_counts": dict(self.message_counts),
             "error_counts": dict(self.error_counts),
-            "uptime_seconds": time.time() - self.last_reset,
+        }
+
+
+class ConnMeta:
+    """Per-connection bookkeeping (slotted: one record per connected client)"""
+    
+    __slots__ = ("connected_at", "last_activity", "message_count", "metadata")
+    
+    def __init__(self,
+                 connected_at: datetime,
+                 last_activity: datetime,
+                 message_count: int = 0,
+                 metadata: Optional[Dict[str, Any]] = None):
+        self.connected_at = connected_at
+        self.last_activity = last_activity
+        self.message_count = message_count
+        self.metadata = metadata or {}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the fields as a plain dict for API responses"""
+        return {
+            "connected_at": self.connected_at,
+            "last_activity": self.last_activity,
+            "message_count": self.message_count,
+            "metadata": self.metadata,
         }
 
 
@@ -83,15 +132,18 @@ class EnhancedNFCConnectionManager:
                  redis_url: str = "redis://localhost:6379",
                  max_connections: int = 200,
                  message_batch_size: int = 50,
-                 batch_timeout: float = 0.1):
+                 batch_timeout: float = 0.1,
+                 redis_pool: Optional[redis.ConnectionPool] = None):
         # Connection management
         self.active_connections: Dict[str, WebSocket] = {}
-        self.connection_metadata: Dict[str, Dict[str, Any]] = {}
+        self.connection_metadata: Dict[str, ConnMeta] = {}
         self.max_connections = max_connections
         
         # Redis setup
         self.redis_url = redis_url
-        self.redis_pool: Optional[redis.ConnectionPool] = None
+        self.redis_pool: Optional[redis.ConnectionPool] = redis_pool
+        # A pool passed in by the caller is shared, so cleanup() leaves it open
+        self._owns_redis_pool = redis_pool is None
         self.redis_client: Optional[redis.Redis] = None
         
         # Message batching
@@ -116,12 +168,13 @@ class EnhancedNFCConnectionManager:
     async def initialize(self):
         """Initialize the connection manager"""
         try:
-            # Initialize Redis connection pool
-            self.redis_pool = redis.ConnectionPool.from_url(
-                self.redis_url,
-                max_connections=100,
-                decode_responses=True
-            )
+            # Initialize Redis connection pool (unless a shared one was given)
+            if self.redis_pool is None:
+                self.redis_pool = redis.ConnectionPool.from_url(
+                    self.redis_url,
+                    max_connections=100,
+                    decode_responses=True
+                )
             self.redis_client = redis.Redis(connection_pool=self.redis_pool)
             
             # Test Redis connection
@@ -153,7 +206,7 @@ class EnhancedNFCConnectionManager:
         # Close Redis connection
         if self.redis_client:
             await self.redis_client.close()
-        if self.redis_pool:
+        if self.redis_pool and self._owns_redis_pool:
             await self.redis_pool.disconnect()
     
     async def optimized_connect(self, websocket: WebSocket, client_id: str, metadata: Dict[str, Any] = None) -> bool:
@@ -168,7 +221,8 @@ class EnhancedNFCConnectionManager:
         Returns:
             bool: True if connection successful, False otherwise
         """
-        start_time = time.time()
+        # Durations use the monotonic clock; timestamps read the wall clock once below
+        start_time = time.monotonic()
         
         try:
             # Check connection limit
@@ -182,27 +236,26 @@ class EnhancedNFCConnectionManager:
             # Accept connection
             await websocket.accept()
             
+            connected_at = datetime.now()
+            
             async with self._connection_lock:
                 self.active_connections[client_id] = websocket
-                self.connection_metadata[client_id] = {
-                    "connected_at": datetime.now(),
-                    "last_activity": datetime.now(),
-                    "message_count": 0,
-                    "metadata": metadata or {}
-                }
+                self.connection_metadata[client_id] = ConnMeta(
+                    connected_at, connected_at, 0, metadata
+                )
             
             # Store in Redis for distributed tracking
             await self.redis_client.hset(
                 "nfc:connections",
                 client_id,
                 json.dumps({
-                    "connected_at": datetime.now().isoformat(),
+                    "connected_at": connected_at.isoformat(),
                     "metadata": metadata or {}
                 })
             )
             
             # Track connection time
-            self.performance_metrics.record_connection_time(time.time() - start_time)
+            self.performance_metrics.record_connection_time(time.monotonic() - start_time)
             self.performance_metrics.increment_message_count("connection")
             
             logger.info(f"Client {client_id} connected. Total connections: {len(self.active_connections)}")
@@ -211,7 +264,7 @@ class EnhancedNFCConnectionManager:
             await self.send_personal_message(client_id, {
                 "type": "connection_established",
                 "client_id": client_id,
-                "server_time": datetime.now().isoformat(),
+                "server_time": connected_at.isoformat(),
                 "config": {
                     "heartbeat_interval": 30,
                     "reconnect_delay": 5,
@@ -249,7 +302,7 @@ class EnhancedNFCConnectionManager:
     
     async def send_personal_message(self, client_id: str, message: Dict[str, Any]):
         """Send message to specific client"""
-        start_time = time.time()
+        start_time = time.monotonic()
         
         try:
             if client_id in self.active_connections:
@@ -257,12 +310,13 @@ class EnhancedNFCConnectionManager:
                 await websocket.send_json(message)
                 
                 # Update metadata
-                if client_id in self.connection_metadata:
-                    self.connection_metadata[client_id]["last_activity"] = datetime.now()
-                    self.connection_metadata[client_id]["message_count"] += 1
+                conn_meta = self.connection_metadata.get(client_id)
+                if conn_meta is not None:
+                    conn_meta.last_activity = datetime.now()
+                    conn_meta.message_count += 1
                 
                 # Track performance
-                self.performance_metrics.record_response_time(time.time() - start_time)
+                self.performance_metrics.record_response_time(time.monotonic() - start_time)
                 self.performance_metrics.increment_message_count("personal_message")
                 
         except WebSocketDisconnect:
@@ -290,7 +344,7 @@ class EnhancedNFCConnectionManager:
     async def _batch_message_processor(self):
         """Internal batch message processor"""
         batch = []
-        last_process_time = time.time()
+        last_process_time = time.monotonic()
         
         while True:
             try:
@@ -298,7 +352,7 @@ class EnhancedNFCConnectionManager:
                 while len(batch) < self.message_batch_size:
                     try:
                         # Wait for message with timeout
-                        timeout = self.batch_timeout - (time.time() - last_process_time)
+                        timeout = self.batch_timeout - (time.monotonic() - last_process_time)
                         if timeout <= 0:
                             break
                         
@@ -316,7 +370,7 @@ class EnhancedNFCConnectionManager:
                     await self._process_message_batch(batch)
                     batch.clear()
                 
-                last_process_time = time.time()
+                last_process_time = time.monotonic()
                 
                 # Small delay to prevent tight loop
                 await asyncio.sleep(0.01)
@@ -329,7 +383,7 @@ class EnhancedNFCConnectionManager:
     
     async def _process_message_batch(self, batch: List[Dict[str, Any]]):
         """Process a batch of messages"""
-        start_time = time.time()
+        start_time = time.monotonic()
         
         # Group messages by type
         broadcasts = []
@@ -376,7 +430,7 @@ class EnhancedNFCConnectionManager:
                 await self.disconnect(client_id)
             
             # Track performance
-            batch_time = time.time() - start_time
+            batch_time = time.monotonic() - start_time
             self.performance_metrics.record_response_time(batch_time / len(broadcasts))
             self.performance_metrics.increment_message_count(f"batch_broadcast_{len(broadcasts)}")
     
@@ -397,9 +451,8 @@ class EnhancedNFCConnectionManager:
         stale_connections = []
         
         async with self._connection_lock:
-            for client_id, metadata in self.connection_metadata.items():
-                last_activity = metadata.get("last_activity", now)
-                if now - last_activity > timedelta(minutes=5):
+            for client_id, conn_meta in self.connection_metadata.items():
+                if now - conn_meta.last_activity > timedelta(minutes=5):
                     stale_connections.append(client_id)
         
         # Ping stale connections
@@ -481,19 +534,21 @@ class EnhancedNFCConnectionManager:
     
     async def get_connection_info(self, client_id: str) -> Optional[Dict[str, Any]]:
         """Get information about a specific connection"""
-        if client_id in self.connection_metadata:
-            metadata = self.connection_metadata[client_id].copy()
-            metadata["connected_duration"] = (datetime.now() - metadata["connected_at"]).total_seconds()
+        conn_meta = self.connection_metadata.get(client_id)
+        if conn_meta is not None:
+            metadata = conn_meta.to_dict()
+            metadata["connected_duration"] = (datetime.now() - conn_meta.connected_at).total_seconds()
             return metadata
         return None
     
     async def get_all_connections(self) -> List[Dict[str, Any]]:
         """Get information about all active connections"""
         connections = []
-        for client_id, metadata in self.connection_metadata.items():
-            info = metadata.copy()
+        now = datetime.now()
+        for client_id, conn_meta in self.connection_metadata.items():
+            info = conn_meta.to_dict()
             info["client_id"] = client_id
-            info["connected_duration"] = (datetime.now() - metadata["connected_at"]).total_seconds()
+            info["connected_duration"] = (now - conn_meta.connected_at).total_seconds()
             connections.append(info)
         return connections
 
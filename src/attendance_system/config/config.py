@@ -105,6 +105,7 @@ class Settings(BaseSettings):
     # パフォーマンス設定
     MAX_CONNECTIONS_COUNT: int = 100
     MIN_CONNECTIONS_COUNT: int = 10
+    WS_MAX_CONNECTIONS: int = 1000  # WebSocket同時接続数の上限
     
     # 監視設定
     ENABLE_MONITORING: bool = True
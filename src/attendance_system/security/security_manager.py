@@ -25,6 +25,9 @@ from ..config.config import config
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# セッションタイムアウト（30分）
+_SESSION_TIMEOUT = timedelta(minutes=30)
+
 @dataclass
 class SecurityContext:
     """セキュリティコンテキスト"""
@@ -198,14 +201,19 @@ class SecurityManager:
         return session_id
     
     def validate_session(self, session_id: str, ip_address: str, user_agent: str) -> Optional[SecurityContext]:
-        """セッションの検証"""
-        if session_id not in self._session_store:
-            return None
+        """
+        セッションの検証
         
-        context = self._session_store[session_id]
+        セッションストアはメモリ上のdictのため、検証結果のキャッシュは持たない
+        （IP/User-Agentの照合と破棄を常に即時反映させる）。
+        """
+        context = self._session_store.get(session_id)
+        if context is None:
+            return None
         
-        # セッションタイムアウト（30分）
-        if datetime.utcnow() - context.timestamp > timedelta(minutes=30):
+        # セッションタイムアウト
+        now = datetime.utcnow()
+        if now - context.timestamp > _SESSION_TIMEOUT:
             self.destroy_session(session_id)
             return None
         
@@ -222,7 +230,7 @@ class SecurityManager:
             return None
         
         # セッション更新
-        context.timestamp = datetime.utcnow()
+        context.timestamp = now
         return context
     
     def destroy_session(self, session_id: str) -> None:
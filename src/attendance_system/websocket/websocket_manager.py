@@ -3,14 +3,16 @@ WebSocketManager - リアルタイムNFC通信
 iPhone Suica対応 企業向け勤怠管理システム
 """
 import asyncio
-import json
 import logging
+import sys
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, Set, Optional, List, Any
-from dataclasses import dataclass, asdict
+from typing import DefaultDict, Dict, Set, Optional, List, Any
+from dataclasses import dataclass, field
 from enum import Enum
 import weakref
 
+import orjson
 import websockets
 from websockets.server import WebSocketServerProtocol
 from websockets.exceptions import ConnectionClosed, WebSocketException
@@ -22,6 +24,9 @@ from ..config.config import config
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 接続・メッセージごとに生成されるデータクラスは __slots__ 化する（Python 3.10以降）
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 class MessageType(Enum):
     """WebSocketメッセージタイプ"""
     NFC_SCAN = "nfc_scan"
@@ -33,7 +38,7 @@ class MessageType(Enum):
     AUTH_SUCCESS = "auth_success"
     SYSTEM_STATUS = "system_status"
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class WebSocketMessage:
     """WebSocketメッセージ構造"""
     type: MessageType
@@ -41,28 +46,38 @@ class WebSocketMessage:
     timestamp: datetime = None
     session_id: Optional[str] = None
     user_id: Optional[str] = None
+    # シリアライズ用に事前計算した値（to_json で Enum・datetime を毎回変換しない）
+    _type_value: str = field(init=False, repr=False, compare=False)
+    _timestamp_iso: str = field(init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.timestamp is None:
             self.timestamp = datetime.utcnow()
+        self._type_value = self.type.value
+        self._timestamp_iso = self.timestamp.isoformat()
     
     def to_json(self) -> str:
         """JSON形式への変換"""
-        data = asdict(self)
-        data['type'] = self.type.value
-        data['timestamp'] = self.timestamp.isoformat()
-        return json.dumps(data)
+        # asdict はpayloadを再帰的にコピーするため、フィールドを直接組み立てる
+        data = {
+            'type': self._type_value,
+            'payload': self.payload,
+            'timestamp': self._timestamp_iso,
+            'session_id': self.session_id,
+            'user_id': self.user_id
+        }
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
     
     @classmethod
     def from_json(cls, json_str: str) -> 'WebSocketMessage':
         """JSON形式からの変換"""
-        data = json.loads(json_str)
+        data = orjson.loads(json_str)
         data['type'] = MessageType(data['type'])
         if 'timestamp' in data:
             data['timestamp'] = datetime.fromisoformat(data['timestamp'])
         return cls(**data)
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class ClientConnection:
     """クライアント接続情報"""
     websocket: WebSocketServerProtocol
@@ -89,7 +104,8 @@ class WebSocketManager:
         
         # 接続管理
         self.connections: Dict[WebSocketServerProtocol, ClientConnection] = {}
-        self.user_connections: Dict[str, Set[WebSocketServerProtocol]] = {}
+        # user_id → 接続の逆引きインデックス（ブロードキャスト・オンライン数をO(1)で引く）
+        self.user_connections: DefaultDict[str, Set[WebSocketServerProtocol]] = defaultdict(set)
         
         # パフォーマンス統計
         self.stats = {
@@ -106,7 +122,11 @@ class WebSocketManager:
         self.heartbeat_interval = 30  # 30秒
         self.heartbeat_timeout = 60   # 60秒タイムアウト
         
+        # 送信設定
+        self.send_timeout = 1.0  # ブロードキャスト時の1接続あたりの送信タイムアウト（秒）
+        
         # セキュリティ設定
+        self.max_connections = getattr(self.settings, 'WS_MAX_CONNECTIONS', 1000)
         self.max_connections_per_user = 3
         self.message_rate_limit = 100  # メッセージ/分
         
@@ -125,7 +145,7 @@ class WebSocketManager:
                 user_agent = websocket.request_headers.get('User-Agent', 'unknown') if hasattr(websocket, 'request_headers') and websocket.request_headers else 'unknown'
             
             # 接続制限チェック
-            if len(self.connections) >= 1000:  # 最大接続数制限
+            if len(self.connections) >= self.max_connections:  # 最大接続数制限
                 await websocket.close(code=1013, reason="Server overloaded")
                 return
             
@@ -176,10 +196,8 @@ class WebSocketManager:
                 connection = self.connections[websocket]
                 
                 # ユーザー接続から削除
-                if connection.user_id and connection.user_id in self.user_connections:
-                    self.user_connections[connection.user_id].discard(websocket)
-                    if not self.user_connections[connection.user_id]:
-                        del self.user_connections[connection.user_id]
+                if connection.user_id:
+                    self._discard_user_connection(connection.user_id, websocket)
                 
                 # 接続リストから削除
                 del self.connections[websocket]
@@ -190,6 +208,15 @@ class WebSocketManager:
         except Exception as e:
             logger.error(f"Failed to unregister connection: {str(e)}")
     
+    def _discard_user_connection(self, user_id: str, websocket: WebSocketServerProtocol):
+        """ユーザー接続インデックスから接続を削除（空になったユーザーは削除）"""
+        user_sockets = self.user_connections.get(user_id)
+        if user_sockets is None:
+            return
+        user_sockets.discard(websocket)
+        if not user_sockets:
+            del self.user_connections[user_id]
+    
     async def authenticate_connection(self, websocket: WebSocketServerProtocol, message: WebSocketMessage):
         """接続の認証"""
         try:
@@ -216,15 +243,15 @@ class WebSocketManager:
                 await self.send_error(websocket, "Invalid session")
                 return False
             
+            # 別ユーザーで再認証した場合は旧ユーザーのインデックスから外す
+            if connection.user_id and connection.user_id != context.user_id:
+                self._discard_user_connection(connection.user_id, websocket)
+            
             # 接続情報更新
             connection.user_id = context.user_id
             connection.session_id = session_id
             connection.authenticated = True
             
-            # ユーザー接続リストに追加
-            if context.user_id not in self.user_connections:
-                self.user_connections[context.user_id] = set()
-            
             # 接続数制限チェック
             if len(self.user_connections[context.user_id]) >= self.max_connections_per_user:
                 await self.send_error(websocket, "Too many connections")
@@ -232,14 +259,16 @@ class WebSocketManager:
             
             self.user_connections[context.user_id].add(websocket)
             
-            # 認証成功通知
+            # 認証成功通知（ペイロードとメッセージで同じ時刻を使う）
+            now = datetime.utcnow()
             success_message = WebSocketMessage(
                 type=MessageType.AUTH_SUCCESS,
                 payload={
                     "user_id": context.user_id,
                     "permissions": context.permissions,
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": now.isoformat()
                 },
+                timestamp=now,
                 session_id=session_id,
                 user_id=context.user_id
             )
@@ -337,11 +366,12 @@ class WebSocketManager:
     async def process_attendance_record(self, hashed_idm: str, context: SecurityContext, location: str) -> Dict:
         """出勤記録処理（モック実装）"""
         # 実際の実装では、データベースに記録を保存
+        now = datetime.utcnow()
         record = {
-            'id': f"att_{datetime.utcnow().timestamp()}",
+            'id': f"att_{now.timestamp()}",
             'user_id': context.user_id,
             'idm_hash': hashed_idm,
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': now.isoformat(),
             'type': 'check_in',  # 実際は前回の記録を確認して決定
             'location': location,
             'session_id': context.session_id
@@ -354,24 +384,45 @@ class WebSocketManager:
     
     async def send_message(self, websocket, message: WebSocketMessage):
         """メッセージ送信"""
+        wire = self._serialize(message)
+        if wire is not None:
+            await self._send_wire(websocket, wire)
+    
+    def _serialize(self, message: WebSocketMessage) -> Optional[str]:
+        """メッセージのシリアライズ（失敗時はログを出して None を返す）"""
         try:
-            # FastAPI WebSocket と websockets ライブラリの違いを吸収
-            if hasattr(websocket, 'client_state'):
-                # FastAPI WebSocket の場合
-                from fastapi.websockets import WebSocketState
-                if websocket.client_state != WebSocketState.CONNECTED:
-                    return
-                await websocket.send_text(message.to_json())
-            else:
-                # websockets ライブラリの場合
-                if websocket.closed:
-                    return
-                await websocket.send(message.to_json())
-            
-            self.stats['messages_sent'] += 1
-            
+            return message.to_json()
+        except Exception as e:
+            logger.error("WebSocket send error: %s", e)
+            return None
+    
+    async def _send_wire(self, websocket, wire: str):
+        """シリアライズ済みメッセージの送信"""
+        try:
+            await self._deliver(websocket, wire)
         except Exception as e:
-            logger.error(f"WebSocket send error: {str(e)}")
+            logger.error("WebSocket send error: %s", e)
+    
+    async def _deliver(self, websocket, wire: str):
+        """シリアライズ済みメッセージの送信（失敗時は例外を送出）"""
+        # FastAPI WebSocket と websockets ライブラリの違いを吸収
+        if hasattr(websocket, 'client_state'):
+            # FastAPI WebSocket の場合
+            from fastapi.websockets import WebSocketState
+            if websocket.client_state != WebSocketState.CONNECTED:
+                return
+            await websocket.send_text(wire)
+        else:
+            # websockets ライブラリの場合
+            if websocket.closed:
+                return
+            await websocket.send(wire)
+        
+        self.stats['messages_sent'] += 1
+    
+    async def _safe_send(self, websocket, wire: str):
+        """タイムアウト付き送信（遅いクライアントが他の送信を待たせないようにする）"""
+        await asyncio.wait_for(self._deliver(websocket, wire), timeout=self.send_timeout)
     
     async def send_error(self, websocket, error_message: str):
         """エラーメッセージ送信"""
@@ -386,35 +437,56 @@ class WebSocketManager:
         if user_id not in self.user_connections:
             return
         
-        connections = list(self.user_connections[user_id])
-        for websocket in connections:
-            await self.send_message(websocket, message)
+        # シリアライズは1回だけ行い、全接続へ並行して送信
+        wire = self._serialize(message)
+        if wire is None:
+            return
+        targets = list(self.user_connections[user_id])
+        results = await asyncio.gather(
+            *(self._safe_send(websocket, wire) for websocket in targets),
+            return_exceptions=True
+        )
+        
+        for websocket, result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.error("Broadcast send error: %r", result)
+                self.stats['errors_handled'] += 1
+                if isinstance(result, ConnectionClosed):
+                    # 切断済みの接続は登録解除
+                    await self.unregister_connection(websocket)
     
     async def broadcast_system_status(self):
         """システム状態のブロードキャスト"""
+        now = datetime.utcnow()
         status_message = WebSocketMessage(
             type=MessageType.SYSTEM_STATUS,
             payload={
                 "active_connections": self.stats['active_connections'],
-                "system_time": datetime.utcnow().isoformat(),
+                "system_time": now.isoformat(),
                 "status": "operational"
-            }
+            },
+            timestamp=now
         )
         
+        wire = self._serialize(status_message)
+        if wire is None:
+            return
         for websocket in list(self.connections.keys()):
             if self.connections[websocket].authenticated:
-                await self.send_message(websocket, status_message)
+                await self._send_wire(websocket, wire)
     
     async def handle_heartbeat(self, websocket, message: WebSocketMessage):
         """ハートビート処理"""
         if websocket in self.connections:
             connection = self.connections[websocket]
-            connection.last_heartbeat = datetime.utcnow()
+            now = datetime.utcnow()
+            connection.last_heartbeat = now
             
-            # ハートビート応答
+            # ハートビート応答（受信時刻をそのまま使う）
             heartbeat_response = WebSocketMessage(
                 type=MessageType.HEARTBEAT,
-                payload={"status": "alive", "server_time": datetime.utcnow().isoformat()}
+                payload={"status": "alive", "server_time": now.isoformat()},
+                timestamp=now
             )
             await self.send_message(websocket, heartbeat_response)
     
@@ -479,7 +551,7 @@ class WebSocketManager:
                         else:
                             await self.send_error(websocket, "Unknown message type")
                     
-                    except json.JSONDecodeError:
+                    except orjson.JSONDecodeError:
                         await self.send_error(websocket, "Invalid JSON format")
                     except Exception as e:
                         logger.error(f"Message processing error: {str(e)}")
@@ -3,15 +3,26 @@
 """
 
 import pytest
-from fastapi.testclient import TestClient
 
-from attendance_system.app.main import app
+
+@pytest.fixture(scope="session")
+def app():
+    """アプリ本体は収集時ではなく、テスト実行時に初めてインポートする"""
+    from attendance_system.app.main import app as _app
+
+    return _app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+
+    return TestClient(app)
 
 
 @pytest.mark.unit
-def test_root_endpoint():
+def test_root_endpoint(client):
     """ルートエンドポイントのテスト"""
-    client = TestClient(app)
     response = client.get("/")
 
     assert response.status_code == 200
@@ -23,9 +34,8 @@ def test_root_endpoint():
 
 
 @pytest.mark.unit
-def test_health_endpoint():
+def test_health_endpoint(client):
     """ヘルスチェックエンドポイントのテスト"""
-    client = TestClient(app)
     response = client.get("/health")
 
     assert response.status_code == 200
@@ -37,9 +47,8 @@ def test_health_endpoint():
 
 
 @pytest.mark.unit
-def test_info_endpoint():
+def test_info_endpoint(client):
     """システム情報エンドポイントのテスト"""
-    client = TestClient(app)
     response = client.get("/info")
 
     assert response.status_code == 200
@@ -0,0 +1,42 @@
+"""
+ユーティリティテスト用共通フィクスチャ
+"""
+
+import logging
+
+import pytest
+
+
+class ListHandler(logging.Handler):
+    """出力せずにLogRecordをリストに保持するハンドラ"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def caplog_json(monkeypatch):
+    """
+    指定したロガーにListHandlerを取り付けるファクトリ
+
+    JSONへの整形と再パースを挟まず、LogRecordの属性（extra）を直接検証できる。
+    """
+    restore_levels = []
+
+    def attach(name: str, level: int = logging.INFO) -> ListHandler:
+        logger = logging.getLogger(name)
+        handler = ListHandler()
+        monkeypatch.setattr(logger, "handlers", [handler])
+        monkeypatch.setattr(logger, "propagate", False)
+        restore_levels.append((logger, logger.level))
+        # setLevelでisEnabledForのキャッシュも破棄させる
+        logger.setLevel(level)
+        return handler
+
+    yield attach
+    for logger, level in reversed(restore_levels):
+        logger.setLevel(level)
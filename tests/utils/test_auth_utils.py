@@ -1,9 +1,17 @@
 import pytest
 from fastapi import HTTPException
 
+from backend.app.middleware import auth_bypass
 from backend.app.utils import auth_utils
 
 
+@pytest.fixture(autouse=True)
+def _clear_bypass_cache():
+    auth_bypass.bypass_enabled.cache_clear()
+    yield
+    auth_bypass.bypass_enabled.cache_clear()
+
+
 def test_get_current_user_or_bypass_returns_bypass_user(monkeypatch):
     monkeypatch.setenv("BYPASS_AUTH", "true")
 
@@ -13,6 +21,16 @@ def test_get_current_user_or_bypass_returns_bypass_user(monkeypatch):
     assert user["role"].name == "ADMIN"
 
 
+@pytest.mark.asyncio
+async def test_bypass_flag_is_shared_with_middleware(monkeypatch):
+    monkeypatch.setenv("BYPASS_AUTH", "true")
+
+    assert auth_utils.get_current_user_or_bypass()["username"] == "test_admin"
+    # キャッシュ済みの値を共有するため、変更後も両者の判定は一致する
+    monkeypatch.setenv("BYPASS_AUTH", "false")
+    assert await auth_bypass.auth_bypass_middleware(None) is not None
+
+
 def test_get_current_user_or_bypass_calls_real_get_current_user(monkeypatch):
     monkeypatch.setenv("BYPASS_AUTH", "false")
     sentinel_user = {"username": "real_user"}
@@ -60,6 +78,7 @@ def test_get_current_user_or_bypass_returns_bypass_after_exception(monkeypatch):
 
     def boom():
         monkeypatch.setenv("BYPASS_AUTH", "true")
+        auth_bypass.bypass_enabled.cache_clear()
         raise RuntimeError("auth failure")
 
     monkeypatch.setattr(auth_utils, "get_current_user", boom)
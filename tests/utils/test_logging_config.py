@@ -1,6 +1,7 @@
 import json
 import logging
-from io import StringIO
+import sys
+import tracemalloc
 
 import pytest
 
@@ -13,6 +14,10 @@ from backend.app.utils.logging_config import (
 )
 
 
+# ロガーのハンドラ・レベルを書き換えるテストを含むため同一ワーカーで実行する
+pytestmark = pytest.mark.xdist_group("logging")
+
+
 def test_json_formatter_includes_extra_fields():
     formatter = JSONFormatter()
     record = logging.LogRecord(
@@ -34,6 +39,17 @@ def test_json_formatter_includes_extra_fields():
     assert payload["punch_type"] == "in"
 
 
+def test_json_formatter_serializes_values_stdlib_json_accepts():
+    formatter = JSONFormatter()
+    record = logging.LogRecord("test", logging.INFO, __file__, 10, "Hello", (), None)
+    record.counts = {1: "in", 2: "out"}
+    record.big_number = 2 ** 64
+    payload = json.loads(formatter.format(record))
+
+    assert payload["counts"] == {"1": "in", "2": "out"}
+    assert payload["big_number"] == 2 ** 64
+
+
 def test_security_audit_filter_passes_security_messages():
     audit_filter = SecurityAuditFilter()
     allowed = logging.LogRecord("audit", logging.INFO, __file__, 10, "user login success", (), None)
@@ -43,54 +59,30 @@ def test_security_audit_filter_passes_security_messages():
     assert audit_filter.filter(blocked) is False
 
 
-def test_log_performance_metric_emits_json(monkeypatch):
-    logger = logging.getLogger("performance")
-    stream = StringIO()
-    handler = logging.StreamHandler(stream)
-    logger.handlers = [handler]
-    logger.setLevel(logging.INFO)
-    logger.propagate = False
+def test_log_performance_metric_records_extra_fields(caplog_json):
+    handler = caplog_json("performance")
 
     log_performance_metric("sync_task", 0.123, True, {"extra": "value"})
 
-    handler.flush()
-    log_line = stream.getvalue().strip()
-    payload = json.loads(log_line)
-    assert payload["operation"] == "sync_task"
-    assert payload["duration_ms"] == pytest.approx(123.0, rel=0.01)
-    assert payload["extra"] == "value"
-
+    record = handler.records[0]
+    assert record.__dict__["operation"] == "sync_task"
+    assert record.__dict__["duration_ms"] == pytest.approx(123.0, rel=0.01)
+    assert record.__dict__["extra"] == "value"
 
-def test_log_security_event_writes_warning_for_failure():
-    logger = logging.getLogger("backend.app.utils.logging_config")
-    captured = []
 
-    class _Capture(logging.Handler):
-        def emit(self, record):
-            captured.append(record)
-
-    handler = _Capture()
-    logger.handlers = [handler]
-    logger.setLevel(logging.INFO)
-    logger.propagate = False
+def test_log_security_event_writes_warning_for_failure(caplog_json):
+    handler = caplog_json("backend.app.utils.logging_config")
 
     log_security_event("AUTH_FAIL", user_id="u1", success=False, details="bad password")
 
-    assert captured, "Expected at least one log record"
-    record = captured[0]
+    assert handler.records, "Expected at least one log record"
+    record = handler.records[0]
     assert record.levelno == logging.WARNING
     assert "AUTH_FAIL" in record.getMessage()
 
 
-def test_log_punch_event_outputs_json(monkeypatch):
-    from backend.app.utils.logging_config import log_punch_event
-
-    logger = logging.getLogger("punch")
-    stream = StringIO()
-    handler = logging.StreamHandler(stream)
-    logger.handlers = [handler]
-    logger.setLevel(logging.INFO)
-    logger.propagate = False
+def test_log_punch_event_records_extra_fields(caplog_json):
+    handler = caplog_json("punch")
 
     log_punch_event(
         employee_id=10,
@@ -99,7 +91,39 @@ def test_log_punch_event_outputs_json(monkeypatch):
         processing_time=0.5,
     )
 
-    handler.flush()
-    log_line = stream.getvalue()
-    assert "打刻成功" in log_line
-    assert '"employee_id": 10' in log_line
+    record = handler.records[0]
+    assert "打刻成功" in record.getMessage()
+    assert record.__dict__["employee_id"] == 10
+    assert record.__dict__["punch_type"] == "in"
+
+
+@pytest.fixture
+def disabled_info_loggers(monkeypatch):
+    loggers = [logging.getLogger("performance"), logging.getLogger("punch")]
+    original_levels = [logger.level for logger in loggers]
+    for logger in loggers:
+        monkeypatch.setattr(logger, "handlers", [])
+        logger.setLevel(logging.WARNING)
+    yield
+    for logger, level in zip(loggers, original_levels):
+        logger.setLevel(level)
+
+
+def test_log_helpers_skip_work_when_level_disabled(disabled_info_loggers):
+    metadata = {"extra": "value"}
+    # 初回呼び出しによる内部キャッシュの確保を計測対象から外す
+    log_performance_metric("warmup", 0.1, True, metadata)
+    log_punch_event(employee_id=1, punch_type="in", success=True, processing_time=0.1)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        log_performance_metric("sync_task", 0.123, True, metadata)
+        log_punch_event(employee_id=1, punch_type="in", success=True, processing_time=0.1)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    # extra用のdictすら確保されないこと
+    assert peak - baseline < sys.getsizeof({})
@@ -6,17 +6,35 @@ from backend.app.utils import logging_config
 from backend.app.utils.logging_config import setup_logging, get_logger
 
 
-def test_setup_logging_creates_files(tmp_path, monkeypatch):
-    temp_dir = tmp_path / "logs"
-    monkeypatch.setattr(logging_config.config, "LOG_DIR", str(temp_dir))
-    monkeypatch.setattr(logging_config.config, "DEBUG", False)
+# setup_logging はルートロガーを再構成するため、xdist では logging グループにまとめる
+pytestmark = pytest.mark.xdist_group("logging")
 
-    setup_logging()
 
-    app_log = temp_dir / "app.log"
-    error_log = temp_dir / "error.log"
-    security_log = temp_dir / "security_audit.log"
-    punch_log = temp_dir / "punch.log"
+LOG_FILES = ("app.log", "error.log", "security_audit.log", "punch.log")
+
+
+@pytest.fixture(scope="module")
+def logging_dir(tmp_path_factory):
+    """setup_logging() はモジュール内で1回だけ実行し、ハンドラーを共有する"""
+    log_dir = tmp_path_factory.mktemp("logs")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(logging_config.config, "LOG_DIR", str(log_dir))
+        mp.setattr(logging_config.config, "DEBUG", False)
+        setup_logging()
+        yield log_dir
+
+
+@pytest.fixture(autouse=True)
+def _truncate_logs(logging_dir):
+    for name in LOG_FILES:
+        (logging_dir / name).write_text("", encoding="utf-8")
+
+
+def test_setup_logging_creates_files(logging_dir):
+    app_log = logging_dir / "app.log"
+    error_log = logging_dir / "error.log"
+    security_log = logging_dir / "security_audit.log"
+    punch_log = logging_dir / "punch.log"
     assert app_log.exists()
     assert error_log.exists()
     assert security_log.exists()
@@ -30,12 +48,7 @@ def test_setup_logging_creates_files(tmp_path, monkeypatch):
     assert "hello world" in contents
 
 
-def test_log_punch_event_writes_json(tmp_path, monkeypatch):
-    temp_dir = tmp_path / "logs"
-    monkeypatch.setattr(logging_config.config, "LOG_DIR", str(temp_dir))
-    monkeypatch.setattr(logging_config.config, "DEBUG", False)
-    setup_logging()
-
+def test_log_punch_event_writes_json(logging_dir):
     logging_config.log_punch_event(
         employee_id=99,
         punch_type="in",
@@ -43,7 +56,7 @@ def test_log_punch_event_writes_json(tmp_path, monkeypatch):
         processing_time=0.42,
     )
 
-    punch_log = temp_dir / "punch.log"
+    punch_log = logging_dir / "punch.log"
     with punch_log.open() as fh:
         lines = [line for line in fh.read().splitlines() if line]
 
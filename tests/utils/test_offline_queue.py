@@ -9,16 +9,47 @@ from backend.app.utils import offline_queue
 from backend.app.utils.offline_queue import OfflineQueueManager
 
 
-@pytest.fixture
-def manager(tmp_path, monkeypatch):
+# モジュール共有のキューマネージャーとconfigの差し替えに依存する
+pytestmark = pytest.mark.xdist_group("offline_queue")
+
+
+MEMORY_DB_URI = "file:offline_queue_test?mode=memory&cache=shared"
+
+
+@pytest.fixture(scope="module")
+def manager(tmp_path_factory):
+    """モジュール内で共有するキューマネージャー（共有キャッシュのインメモリDBを使用）"""
     mock_config = SimpleNamespace(
         SLACK_ENABLED=False,
         SLACK_TOKEN="",
-        DATA_DIR=str(tmp_path),
+        DATA_DIR=str(tmp_path_factory.mktemp("oq")),
     )
-    monkeypatch.setattr(offline_queue, "config", mock_config)
-    db_path = tmp_path / "offline_queue.db"
-    return OfflineQueueManager(db_path=str(db_path))
+    # 共有インメモリDBは最後の接続が閉じると破棄されるため、接続を保持しておく
+    keepalive = sqlite3.connect(MEMORY_DB_URI, uri=True)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(offline_queue, "config", mock_config)
+        shared = OfflineQueueManager(db_path=MEMORY_DB_URI)
+        yield shared
+        shared.cleanup()
+    keepalive.close()
+
+
+@pytest.fixture(autouse=True)
+def _reset_queue(manager):
+    """テストごとにキューを空にし、共有マネージャーの状態を初期化"""
+    # MAX_QUEUE_SIZE/SYNC_INTERVAL やテストで差し替えたメソッドはクラス定義に戻す
+    for name in list(vars(manager)):
+        if hasattr(OfflineQueueManager, name):
+            delattr(manager, name)
+    manager.is_running = False
+    manager.sync_thread = None
+    manager.stop_event = offline_queue.Event()
+    manager._last_notification_time = None
+    # 代入で通知の送信処理も束縛し直される
+    manager.slack_client = None
+    with manager._connect() as conn:
+        conn.execute("DELETE FROM offline_punches")
+        conn.commit()
 
 
 def sample_punch(card_suffix="001"):
@@ -70,7 +101,7 @@ def test_cleanup_old_records_removes_outdated_entries(manager):
     manager.add_punch(sample_punch())
     record = manager.get_pending_punches()[0]
 
-    with sqlite3.connect(manager.db_path) as conn:
+    with manager._connect() as conn:
         conn.execute(
             "UPDATE offline_punches SET created_at = ? WHERE id = ?",
             ((datetime.now() - timedelta(days=10)).isoformat(), record["id"]),
@@ -81,6 +112,28 @@ def test_cleanup_old_records_removes_outdated_entries(manager):
     assert manager.get_pending_punches() == []
 
 
+def test_get_pending_punches_selects_requested_columns(manager):
+    manager.add_punch(sample_punch("300"))
+
+    pending = manager.get_pending_punches(columns=("id", "employee_id", "punch_type"))
+
+    assert list(pending[0]) == ["id", "employee_id", "punch_type"]
+    full = manager.hydrate_punch(pending[0]["id"])
+    assert full["employee_id"] == pending[0]["employee_id"]
+    assert full["retry_count"] == 0
+    assert manager.hydrate_punch(-1) is None
+
+
+def test_get_pending_punches_rejects_unknown_columns(manager):
+    with pytest.raises(ValueError):
+        manager.get_pending_punches(columns=("id", "1; DROP TABLE offline_punches"))
+
+
+def test_get_pending_punches_rejects_empty_columns(manager):
+    with pytest.raises(ValueError):
+        manager.get_pending_punches(columns=[])
+
+
 def test_get_stats_reports_queue_usage(manager):
     manager.add_punch(sample_punch("100"))
     manager.add_punch(sample_punch("200"))
@@ -136,60 +189,34 @@ def test_send_slack_notification_handles_error(slack_manager):
     fake_client.chat_postMessage.assert_called_once()
 
 
-class ImmediateThread:
-    def __init__(self, target, daemon=False):
-        self._target = target
-
-    def start(self):
-        self._target()
-
-    def join(self, timeout=None):
-        return None
-
-    def is_alive(self):
-        return False
-
-
-def test_sync_thread_processes_success_and_failures(manager, monkeypatch):
-    monkeypatch.setattr(offline_queue, "Thread", ImmediateThread)
-    manager.SYNC_INTERVAL = 0
+def test_sync_thread_processes_success_and_failures(manager):
     manager.add_punch(sample_punch("201"))
     manager.add_punch(sample_punch("202"))
 
     processed = []
 
     def sync_callback(punch):
+        # リトライ管理用の列は同期コールバックに渡さない
+        assert "error_message" not in punch
         processed.append(punch["id"])
-        if len(processed) == 2:
-            manager.stop_event.set()
         return len(processed) == 1
 
-    manager.start_sync_thread(sync_callback)
-    manager.stop_sync_thread()
+    manager._run_sync_once(sync_callback)
 
+    assert len(processed) == 2
     pending = manager.get_pending_punches()
     assert len(pending) == 1
     assert pending[0]["retry_count"] == 1
 
 
-def test_sync_thread_sends_slack_on_many_failures(manager, monkeypatch):
-    monkeypatch.setattr(offline_queue, "Thread", ImmediateThread)
-    manager.SYNC_INTERVAL = 0
+def test_sync_thread_sends_slack_on_many_failures(manager):
     total = 6
-    for idx in range(total):
-        manager.add_punch(sample_punch(f"30{idx}"))
-
-    processed = []
+    assert manager.add_punches([sample_punch(f"30{idx}") for idx in range(total)])
     manager._send_slack_notification = MagicMock()
 
-    def failing_callback(punch):
-        processed.append(punch["id"])
-        if len(processed) == total:
-            manager.stop_event.set()
-        return False
-
-    manager.start_sync_thread(failing_callback)
-    manager.stop_sync_thread()
+    manager._run_sync_once(lambda punch: False)
+    # 1時間以内の再通知は抑制される
+    manager._run_sync_once(lambda punch: False)
 
     manager._send_slack_notification.assert_called_once()
 
@@ -220,6 +247,24 @@ def test_default_db_path_and_memory_fallback(tmp_path, monkeypatch):
         manager.cleanup()
 
 
+def test_add_punches_inserts_batch_and_skips_duplicates(manager):
+    punches = [sample_punch("701"), sample_punch("702"), sample_punch("701")]
+
+    assert manager.add_punches(punches) is True
+
+    pending = manager.get_pending_punches(limit=10)
+    assert sorted(p["card_idm_hash"] for p in pending) == ["card701", "card702"]
+
+
+def test_add_punches_trims_queue_to_max_size(manager):
+    manager.MAX_QUEUE_SIZE = 2
+    manager.add_punch(sample_punch("711"))
+    manager.add_punches([sample_punch("712"), sample_punch("713")])
+
+    pending = manager.get_pending_punches(limit=10)
+    assert sorted(p["card_idm_hash"] for p in pending) == ["card712", "card713"]
+
+
 def test_add_punch_evicts_oldest_when_queue_full(manager):
     manager.MAX_QUEUE_SIZE = 1
     manager.add_punch(sample_punch("801"))
@@ -237,64 +282,56 @@ def test_start_sync_thread_noop_when_already_running(manager):
     manager.is_running = False
 
 
-def test_sync_thread_updates_retry_on_exception(manager, monkeypatch):
-    monkeypatch.setattr(offline_queue, "Thread", ImmediateThread)
-    manager.SYNC_INTERVAL = 0
+def test_sync_thread_updates_retry_on_exception(manager):
     manager.add_punch(sample_punch("901"))
 
     def raising_callback(punch):
-        manager.stop_event.set()
         raise RuntimeError("boom")
 
-    manager.start_sync_thread(raising_callback)
-    manager.stop_sync_thread()
+    manager._run_sync_once(raising_callback)
 
     pending = manager.get_pending_punches()
     assert pending[0]["retry_count"] == 1
 
 
-class PersistentThread:
-    def __init__(self, target, daemon=False):
-        self._target = target
-
-    def start(self):
-        self._target()
+def test_stop_sync_thread_logs_when_thread_alive(manager):
+    manager.is_running = True
+    manager.sync_thread = MagicMock()
+    manager.sync_thread.is_alive.return_value = True
 
-    def join(self, timeout=None):
-        return None
+    manager.stop_sync_thread()
 
-    def is_alive(self):
-        return True
+    manager.sync_thread.join.assert_called_once_with(timeout=5)
+    assert manager.is_running is False
+    assert manager.stop_event.is_set()
 
 
-def test_stop_sync_thread_logs_when_thread_alive(manager, monkeypatch):
-    monkeypatch.setattr(offline_queue, "Thread", PersistentThread)
-    manager.SYNC_INTERVAL = 0
+def test_start_sync_thread_runs_sync_in_background(manager):
     manager.add_punch(sample_punch("910"))
+    synced = offline_queue.Event()
 
     def callback(punch):
-        manager.stop_event.set()
+        synced.set()
         return True
 
     manager.start_sync_thread(callback)
-    manager.stop_sync_thread()
+    try:
+        assert synced.wait(timeout=5)
+    finally:
+        manager.stop_sync_thread()
+
     assert manager.is_running is False
+    assert not manager.sync_thread.is_alive()
+    assert manager.get_pending_punches() == []
 
 
 def test_sync_thread_triggers_cleanup_check(manager, monkeypatch):
-    monkeypatch.setattr(offline_queue, "Thread", ImmediateThread)
     manager.SYNC_INTERVAL = 1
     manager.add_punch(sample_punch("920"))
     manager._cleanup_old_records = MagicMock()
     monkeypatch.setattr(offline_queue.time, "time", lambda: 0)
-    monkeypatch.setattr(manager.stop_event, "wait", lambda timeout: None)
-
-    def callback(punch):
-        manager.stop_event.set()
-        return True
 
-    manager.start_sync_thread(callback)
-    manager.stop_sync_thread()
+    manager._run_sync_once(lambda punch: True)
 
     manager._cleanup_old_records.assert_called()
 
@@ -359,18 +396,16 @@ def test_update_retry_status_handles_exception(manager, monkeypatch):
     assert manager.update_retry_status(1, "err") is False
 
 
-def test_sync_thread_handles_outer_exception(manager, monkeypatch):
-    monkeypatch.setattr(offline_queue, "Thread", ImmediateThread)
-    manager.SYNC_INTERVAL = 0
-
+def test_sync_thread_handles_outer_exception(manager):
     def failing_pending():
-        manager.stop_event.set()
         raise RuntimeError("boom")
 
     manager.get_pending_punches = failing_pending  # type: ignore
+    callback = MagicMock()
 
-    manager.start_sync_thread(lambda punch: True)
-    manager.stop_sync_thread()
+    manager._run_sync_once(callback)
+
+    callback.assert_not_called()
 
 
 def test_send_slack_notification_returns_when_not_configured(manager):
@@ -378,6 +413,19 @@ def test_send_slack_notification_returns_when_not_configured(manager):
     assert manager._send_slack_notification("hello") is None
 
 
+def test_slack_client_assigned_after_init_is_used(manager, monkeypatch):
+    fake_client = MagicMock()
+    monkeypatch.setattr(offline_queue.config, "SLACK_CHANNEL", "#alerts", raising=False)
+
+    manager.slack_client = fake_client
+    manager._send_slack_notification("hello")
+    fake_client.chat_postMessage.assert_called_once()
+
+    manager.slack_client = None
+    manager._send_slack_notification("hello")
+    fake_client.chat_postMessage.assert_called_once()
+
+
 def test_get_stats_handles_exception(manager, monkeypatch):
     def failing_connect(*args, **kwargs):
         raise RuntimeError("stats fail")
@@ -404,6 +452,9 @@ def test_add_punch_handles_integrity_error(manager, monkeypatch):
                 raise offline_queue.sqlite3.IntegrityError("dup")
             return FakeResult()
 
+        def executemany(self, sql, rows):
+            return self.execute(sql, rows)
+
         def commit(self):
             return None
 
@@ -434,6 +485,8 @@ def test_init_database_handles_operational_error(tmp_path, monkeypatch):
 
     manager._init_database()
     assert db_path.exists()
+    with original_connect(str(db_path)) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
 
 
 def test_offline_queue_init_handles_operational_error(tmp_path, monkeypatch):
@@ -1,16 +1,34 @@
 from pathlib import Path
 
 import pytest
-from fastapi import FastAPI
-from fastapi.testclient import TestClient
 
-from backend.app import spa_mount_runtime
 
+@pytest.fixture(scope="module")
+def spa_mount_runtime():
+    """FastAPI関連のインポートは収集時ではなく実行時に行う"""
+    from backend.app import spa_mount_runtime as module
 
-def test_apply_spa_mount_skips_when_static_missing(monkeypatch):
+    return module
+
+
+@pytest.fixture
+def app():
+    from fastapi import FastAPI
+
+    return FastAPI()
+
+
+@pytest.fixture
+def spa_client(app):
+    """アプリへのリクエストは初回送信時に解決されるため、マウント前に生成してよい"""
+    from fastapi.testclient import TestClient
+
+    return TestClient(app)
+
+
+def test_apply_spa_mount_skips_when_static_missing(spa_mount_runtime, app, monkeypatch):
     fake_root = Path("/tmp/nonexistent_spa_dir")
     monkeypatch.setattr(spa_mount_runtime, "__file__", str(fake_root / "spa_mount_runtime.py"))
-    app = FastAPI()
 
     spa_mount_runtime.apply_spa_mount(app)
 
@@ -18,7 +36,7 @@ def test_apply_spa_mount_skips_when_static_missing(monkeypatch):
     assert asset_routes == []
 
 
-def test_apply_spa_mount_serves_assets_and_index(tmp_path, monkeypatch):
+def test_apply_spa_mount_serves_assets_and_index(spa_mount_runtime, app, spa_client, tmp_path, monkeypatch):
     fake_root = tmp_path / "spa_runtime"
     static_dir = fake_root / "static"
     assets_dir = static_dir / "assets"
@@ -28,31 +46,29 @@ def test_apply_spa_mount_serves_assets_and_index(tmp_path, monkeypatch):
     (static_dir / "robots.txt").write_text("robots", encoding="utf-8")
     monkeypatch.setattr(spa_mount_runtime, "__file__", str(fake_root / "spa_mount_runtime.py"))
 
-    app = FastAPI()
     @app.get("/api/data")
     async def api_data():
         return {"ok": True}
 
     spa_mount_runtime.apply_spa_mount(app)
-    client = TestClient(app)
 
-    asset_resp = client.get("/assets/app.js")
+    asset_resp = spa_client.get("/assets/app.js")
     assert asset_resp.status_code == 200
     assert "console.log" in asset_resp.text
 
-    fallback_resp = client.get("/dashboard")
+    fallback_resp = spa_client.get("/dashboard")
     assert fallback_resp.status_code == 200
     assert "SPA" in fallback_resp.text
 
-    static_resp = client.get("/robots.txt")
+    static_resp = spa_client.get("/robots.txt")
     assert static_resp.status_code == 200
     assert static_resp.text == "robots"
 
-    api_resp = client.get("/api/data")
+    api_resp = spa_client.get("/api/data")
     assert api_resp.json() == {"ok": True}
 
 
-def test_spa_fallback_skips_health_paths(tmp_path, monkeypatch):
+def test_spa_fallback_skips_health_paths(spa_mount_runtime, app, spa_client, tmp_path, monkeypatch):
     fake_root = tmp_path / "spa_runtime"
     static_dir = fake_root / "static"
     assets_dir = static_dir / "assets"
@@ -60,26 +76,39 @@ def test_spa_fallback_skips_health_paths(tmp_path, monkeypatch):
     (static_dir / "index.html").write_text("index", encoding="utf-8")
     monkeypatch.setattr(spa_mount_runtime, "__file__", str(fake_root / "spa_mount_runtime.py"))
 
-    app = FastAPI()
     spa_mount_runtime.apply_spa_mount(app)
-    client = TestClient(app)
 
-    response = client.get("/health/status")
+    response = spa_client.get("/health/status")
     assert response.status_code == 200
     assert response.text == "null"
 
 
-def test_spa_mount_returns_error_when_index_missing(tmp_path, monkeypatch):
+def test_spa_mount_returns_error_when_index_missing(spa_mount_runtime, app, spa_client, tmp_path, monkeypatch):
     fake_root = tmp_path / "spa_runtime"
     static_dir = fake_root / "static"
     assets_dir = static_dir / "assets"
     assets_dir.mkdir(parents=True)
     monkeypatch.setattr(spa_mount_runtime, "__file__", str(fake_root / "spa_mount_runtime.py"))
 
-    app = FastAPI()
     spa_mount_runtime.apply_spa_mount(app)
-    client = TestClient(app)
 
-    response = client.get("/any")
+    response = spa_client.get("/any")
     assert response.status_code == 200
     assert response.json() == {"error": "SPA not found"}
+
+
+def test_spa_fallback_serves_index_read_at_mount(spa_mount_runtime, app, spa_client, tmp_path, monkeypatch):
+    fake_root = tmp_path / "spa_runtime"
+    static_dir = fake_root / "static"
+    static_dir.mkdir(parents=True)
+    index_file = static_dir / "index.html"
+    index_file.write_text("<html>v1</html>", encoding="utf-8")
+    monkeypatch.setattr(spa_mount_runtime, "__file__", str(fake_root / "spa_mount_runtime.py"))
+
+    spa_mount_runtime.apply_spa_mount(app)
+    index_file.write_text("<html>v2</html>", encoding="utf-8")
+
+    response = spa_client.get("/settings/profile")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert response.text == "<html>v1</html>"
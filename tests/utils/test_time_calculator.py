@@ -1,10 +1,18 @@
 from datetime import datetime, date, time, timedelta
 from types import SimpleNamespace
 
+import numpy as np
+import pytest
+
 from backend.app.utils.time_calculator import TimeCalculator
 from backend.app.models.punch_record import PunchType
 
 
+@pytest.fixture(autouse=True)
+def _clear_calendar_caches():
+    TimeCalculator.is_holiday.cache_clear()
+
+
 def make_punch(punch_type: str, dt: datetime):
     return SimpleNamespace(punch_type=punch_type, punch_time=dt)
 
@@ -88,3 +96,77 @@ def test_calculate_daily_hours_without_clock_in():
     punches = [make_punch(PunchType.OUT.value, datetime(2025, 1, 1, 18, 0))]
     result = calculator.calculate_daily_hours(punches)
     assert result["work_minutes"] == 0
+
+
+def test_calculate_daily_hours_counts_early_morning_night_minutes():
+    calculator = TimeCalculator()
+    start = datetime(2025, 1, 1, 3, 0)
+    punches = [
+        make_punch(PunchType.IN.value, start),
+        make_punch(PunchType.OUT.value, start + timedelta(hours=4)),  # 07:00
+    ]
+
+    result = calculator.calculate_daily_hours(punches)
+
+    # 03:00-05:00 が深夜時間帯
+    assert result["night_minutes"] == 120
+
+
+def test_calculate_daily_hours_subtracts_early_morning_break_from_night():
+    calculator = TimeCalculator()
+    start = datetime(2025, 1, 1, 22, 0)
+    punches = [
+        make_punch(PunchType.IN.value, start),
+        make_punch(PunchType.OUTSIDE.value, datetime(2025, 1, 2, 1, 0)),
+        make_punch(PunchType.RETURN.value, datetime(2025, 1, 2, 2, 0)),
+        make_punch(PunchType.OUT.value, datetime(2025, 1, 2, 6, 0)),
+    ]
+
+    result = calculator.calculate_daily_hours(punches)
+
+    # 22:00-05:00 の7時間から 01:00-02:00 の休憩を除く
+    assert result["night_minutes"] == 360
+
+
+def test_calculate_daily_hours_uses_instance_night_window():
+    calculator = TimeCalculator()
+    calculator.night_start = time(23, 0)
+    calculator.night_end = time(4, 0)
+    start = datetime(2025, 1, 1, 21, 0)
+    punches = [
+        make_punch(PunchType.IN.value, start),
+        make_punch(PunchType.OUT.value, start + timedelta(hours=9)),  # 06:00
+    ]
+
+    result = calculator.calculate_daily_hours(punches)
+
+    # 23:00-04:00 = 5時間
+    assert result["night_minutes"] == 300
+
+
+def test_calculate_daily_hours_batch_groups_by_day():
+    calculator = TimeCalculator()
+    day1 = datetime(2025, 1, 6, 9, 0)
+    day2 = datetime(2025, 1, 7, 21, 0)
+    punch_times = np.array(
+        [
+            day2,
+            day1,
+            day1 + timedelta(hours=3),
+            day1 + timedelta(hours=4),
+            day1 + timedelta(hours=10),
+            day2 + timedelta(hours=3),
+            datetime(2025, 1, 8, 12, 0),
+        ],
+        dtype="datetime64[s]",
+    )
+    punch_types = np.array(["in", "in", "outside", "return", "out", "out", "out"])
+    group_ids = np.array([2, 1, 1, 1, 1, 2, 3])
+
+    result = calculator.calculate_daily_hours_batch(punch_times, punch_types, group_ids)
+
+    assert result["work_minutes"].tolist() == [600, 180, 0]
+    assert result["break_minutes"].tolist() == [60, 0, 0]
+    assert result["actual_work_minutes"].tolist() == [540, 180, 0]
+    assert result["overtime_minutes"].tolist() == [60, 0, 0]
+    assert result["night_minutes"].tolist() == [0, 120, 0]
@@ -43,6 +43,39 @@ def test_calculate_daily_wage_for_hourly_employee():
     assert result["total_wage"] > result["basic_wage"]
 
 
+def test_calculate_daily_wage_amounts_are_floored_to_cents():
+    calculator = WageCalculator()
+    employee = make_hourly_employee(rate=1000)
+
+    result = calculator.calculate_daily_wage(
+        employee,
+        work_minutes=8 * 60 + 1,
+        overtime_minutes=61,
+        night_minutes=7,
+        holiday_minutes=0,
+    )
+
+    # 基本給: 1000 * 420/60 = 7000
+    assert result["basic_wage"] == 7000.0
+    # 残業代: 1000 * 61/60 * 1.25 = 1270.833... → 1270.83
+    assert result["overtime_wage"] == 1270.83
+    # 深夜手当: 1000 * 7/60 * 0.25 = 29.166... → 29.16
+    assert result["night_wage"] == 29.16
+    # 合計は丸め前の合計を切り捨て: 7000 + 1300 = 8300
+    assert result["total_wage"] == 8300.0
+
+
+def test_calculate_daily_wage_cents_have_no_float_noise():
+    calculator = WageCalculator()
+    employee = make_hourly_employee(rate=1000)
+
+    result = calculator.calculate_daily_wage(employee, work_minutes=119)
+
+    # 1000 * 119/60 = 1983.333... → 1983.33（1983.3300000000002 にならない）
+    assert repr(result["basic_wage"]) == "1983.33"
+    assert repr(result["total_wage"]) == "1983.33"
+
+
 def test_calculate_monthly_wage_handles_threshold():
     calculator = WageCalculator()
     employee = make_monthly_employee()
@@ -61,6 +94,53 @@ def test_calculate_monthly_wage_handles_threshold():
     assert result["net_wage"] == pytest.approx(result["total_wage"] * 0.8, rel=0.01)
 
 
+def test_calculate_payroll_batch_matches_monthly_wage():
+    calculator = WageCalculator()
+    employees = [make_hourly_employee(), make_monthly_employee()]
+    summaries = [
+        {"total_work_hours": 170, "overtime_hours": 10, "night_hours": 4, "holiday_hours": 0,
+         "monthly_overtime_minutes": 10 * 60},
+        {"total_work_hours": 230, "overtime_hours": 70, "night_hours": 0, "holiday_hours": 8,
+         "monthly_overtime_minutes": 70 * 60},
+    ]
+
+    results = calculator.calculate_payroll_batch(employees, summaries)
+
+    for employee, summary, result in zip(employees, summaries, results):
+        assert result == calculator.calculate_monthly_wage(
+            employee,
+            total_work_hours=summary["total_work_hours"],
+            total_overtime_hours=summary["overtime_hours"],
+            total_night_hours=summary["night_hours"],
+            total_holiday_hours=summary["holiday_hours"],
+            monthly_overtime_minutes=summary["monthly_overtime_minutes"],
+        )
+    # 時給1200円 × 160時間 = 192000円
+    assert results[0]["basic_wage"] == 192000
+    # 1875円 × (60時間 × 1.25 + 10時間 × 1.5) = 168750円
+    assert results[1]["overtime_wage"] == 168750
+
+
+def test_calculate_monthly_wage_regular_hours_have_no_float_noise():
+    calculator = WageCalculator()
+    employee = make_hourly_employee(rate=1000)
+
+    # 0.3 - 0.1 は float では 0.19999999999999998 になる。
+    # 旧 Decimal 実装は Decimal(str(0.3 - 0.1)) を切り捨てて 199 円を返していた
+    result = calculator.calculate_monthly_wage(
+        employee,
+        total_work_hours=0.3,
+        total_overtime_hours=0.1,
+        total_night_hours=0,
+        total_holiday_hours=0,
+    )
+
+    assert result["basic_wage"] == 200
+    assert result["total_wage"] == 325
+    assert result["deductions"] == 65
+    assert result["net_wage"] == 260
+
+
 def test_calculate_payroll_entry_returns_summary():
     calculator = WageCalculator()
     employee = make_hourly_employee()
@@ -110,3 +190,60 @@ def test_calculate_overtime_with_threshold_normal_rate():
 def test_to_decimal_handles_none():
     calculator = WageCalculator()
     assert calculator._to_decimal(None) == Decimal("0")
+
+
+def test_calculate_overtime_with_threshold_splits_heavy_hours():
+    calculator = WageCalculator()
+    wage = calculator._calculate_overtime_with_threshold(
+        hourly_rate=Decimal("1000"),
+        total_overtime_hours=80,
+        monthly_overtime_minutes=80 * 60,
+    )
+    # 60時間 × 1.25 + 20時間 × 1.5
+    assert wage == Decimal("105000")
+
+
+KERNEL_CASES = [
+    ("floor_to_unit", (1983.3333333, 0.01)),
+    ("daily_wage_kernel", (1000.0, 600, 120, 60, 30, 1.25, 1.25, 1.35)),
+    ("overtime_wage_kernel", (1200.0, 70.0, 10.0, 60.0, 1.25, 1.5)),
+]
+
+
+def _load_kernels_without_numba(monkeypatch):
+    """numba を import できない状態でカーネルモジュールを別名で読み込む"""
+    import importlib.util
+    import sys
+    from pathlib import Path
+
+    from backend.app.utils import _wage_kernels
+
+    monkeypatch.setitem(sys.modules, "numba", None)
+    spec = importlib.util.spec_from_file_location(
+        "_wage_kernels_nojit", Path(_wage_kernels.__file__)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("name,args", KERNEL_CASES)
+def test_kernels_without_numba_match_python(monkeypatch, name, args):
+    from backend.app.utils import _wage_kernels
+
+    fallback = _load_kernels_without_numba(monkeypatch)
+    kernel = getattr(fallback, name)
+    # numba 未導入時はデコレータが関数をそのまま返す
+    assert not hasattr(kernel, "py_func")
+    reference = getattr(_wage_kernels, name)
+    reference = getattr(reference, "py_func", reference)
+    assert kernel(*args) == reference(*args)
+
+
+@pytest.mark.parametrize("name,args", KERNEL_CASES)
+def test_kernels_with_numba_match_python(name, args):
+    pytest.importorskip("numba")
+    from backend.app.utils import _wage_kernels
+
+    kernel = getattr(_wage_kernels, name)
+    assert kernel(*args) == kernel.py_func(*args)
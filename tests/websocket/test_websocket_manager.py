@@ -6,6 +6,7 @@ import pytest
 import asyncio
 import json
 import os
+from collections import deque
 from datetime import datetime
 from unittest.mock import AsyncMock, Mock, patch
 
@@ -28,7 +29,7 @@ class MockWebSocket:
     def __init__(self):
         self.closed = False
         self.messages_sent = []
-        self.messages_to_receive = []
+        self.messages_to_receive = deque()
         self.remote_address = ("127.0.0.1", 12345)
         self.request_headers = {"User-Agent": "test-client/1.0"}
     
@@ -44,17 +45,25 @@ class MockWebSocket:
     
     async def __anext__(self):
         if self.messages_to_receive:
-            return self.messages_to_receive.pop(0)
+            return self.messages_to_receive.popleft()
         raise StopAsyncIteration
 
 class TestWebSocketManager:
     """WebSocketManager テストクラス"""
     
-    @pytest.fixture
-    def security_manager(self):
-        """SecurityManager インスタンス"""
+    @pytest.fixture(scope="module")
+    def shared_security_manager(self):
+        """モジュール内で共有する SecurityManager（初期化時の鍵導出が重いため）"""
         return SecurityManager()
     
+    @pytest.fixture
+    def security_manager(self, shared_security_manager):
+        """SecurityManager インスタンス（セッション・レート制限はテストごとに初期化）"""
+        shared_security_manager._session_store.clear()
+        shared_security_manager._rate_limits.clear()
+        shared_security_manager._failed_attempts.clear()
+        return shared_security_manager
+    
     @pytest.fixture
     def websocket_manager(self, security_manager):
         """WebSocketManager インスタンス"""
@@ -183,6 +192,24 @@ class TestWebSocketManager:
         
         assert result is False
     
+    @pytest.mark.asyncio
+    async def test_user_connection_index_follows_reauthentication(self, websocket_manager, mock_websocket, security_manager):
+        """再認証・切断時にユーザー接続インデックスが更新されることのテスト"""
+        await websocket_manager.register_connection(mock_websocket, "/ws")
+        
+        for user_id in ("user_a", "user_b"):
+            session_id = security_manager.create_session(user_id, "127.0.0.1", "test-client/1.0")
+            auth_message = WebSocketMessage(
+                type=MessageType.SESSION_VALIDATE,
+                payload={"session_id": session_id}
+            )
+            assert await websocket_manager.authenticate_connection(mock_websocket, auth_message)
+        
+        assert set(websocket_manager.user_connections) == {"user_b"}
+        
+        await websocket_manager.unregister_connection(mock_websocket)
+        assert websocket_manager.get_stats()['users_online'] == 0
+    
     # ===========================================
     # NFC スキャンテスト
     # ===========================================
@@ -383,6 +410,47 @@ class TestWebSocketManager:
             system_broadcast_messages = [msg for msg in system_messages if msg['payload'].get('message') == 'System update']
             assert len(system_broadcast_messages) == 1
     
+    @pytest.mark.asyncio
+    async def test_broadcast_to_user_isolates_failing_connection(self, websocket_manager, security_manager):
+        """送信失敗・遅延する接続があっても他の接続へ配信されることのテスト"""
+        healthy = MockWebSocket()
+        failing = MockWebSocket()
+        slow = MockWebSocket()
+        failing.send = AsyncMock(side_effect=RuntimeError("send failed"))
+        
+        async def slow_send(message):
+            await asyncio.sleep(1)
+        
+        slow.send = slow_send
+        websocket_manager.send_timeout = 0.05
+        
+        user_id = "test_user"
+        websocket_manager.user_connections[user_id] = {healthy, failing, slow}
+        
+        broadcast_message = WebSocketMessage(
+            type=MessageType.SYSTEM_STATUS,
+            payload={"message": "System update"}
+        )
+        await websocket_manager.broadcast_to_user(user_id, broadcast_message)
+        
+        assert len(healthy.messages_sent) == 1
+        assert websocket_manager.stats['errors_handled'] == 2
+    
+    @pytest.mark.asyncio
+    async def test_unserializable_message_is_logged_not_raised(self, websocket_manager):
+        """シリアライズできないメッセージは送信せず、呼び出し元へ例外を伝えないことのテスト"""
+        ws = MockWebSocket()
+        websocket_manager.user_connections["test_user"] = {ws}
+        bad_message = WebSocketMessage(
+            type=MessageType.SYSTEM_STATUS,
+            payload={"value": object()}
+        )
+        
+        await websocket_manager.send_message(ws, bad_message)
+        await websocket_manager.broadcast_to_user("test_user", bad_message)
+        
+        assert ws.messages_sent == []
+    
     # ===========================================
     # 統計情報テスト
     # ===========================================
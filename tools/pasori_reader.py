@@ -20,9 +20,21 @@ import os
 import time
 import sys
 import json
+import base64
+import queue
+import threading
 import requests
 import signal
 import nfc
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    # orjson があれば打刻ペイロードのシリアライズに使う（任意）
+    import orjson
+    ENCODE = orjson.dumps
+except ImportError:
+    ENCODE = json.dumps
 
 # 環境変数から設定を読み込み
 API_BASE = os.getenv("API_BASE", "http://localhost:8080")
@@ -33,41 +45,98 @@ API_PASS = os.getenv("API_PASS", "admin123!")
 PUNCH_ORDER = ["in", "outside", "return", "out"]
 last_idx = -1  # 起動直後は in から
 
+# API接続はSessionで使い回す（タップごとのTCP/TLSハンドシェイクを避ける）
+SESSION = requests.Session()
+SESSION.headers.update({"Content-Type": "application/json"})
+SESSION.mount(
+    API_BASE,
+    HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=4,
+        max_retries=Retry(total=2, backoff_factor=0.2),
+    ),
+)
+
+# 読み取りスレッドからAPI送信ワーカーへ渡す打刻キュー
+TAP_QUEUE = queue.Queue(maxsize=32)
+TAP_DEBOUNCE_SECONDS = 0.3
+# 終了時、送信待ちの打刻を送り切るまで待つ最大秒数
+TAP_DRAIN_TIMEOUT_SECONDS = 30
+# ワーカーに終了を伝える番兵（キュー内の打刻をすべて送った後に取り出される）
+_STOP_WORKER = None
+
+# トークン有効期限の何秒前に再ログインするか
+TOKEN_REFRESH_MARGIN = 60
+
 # グローバル変数
-token = None
-terminate_flag = False
+# on_connect は nfcpy のスレッドから呼ばれるため、トークン関連はロックで保護する
+_token_lock = threading.Lock()
+token_exp_ts = 0.0
+TERMINATE = threading.Event()
+
+
+def _decode_token_exp(access_token):
+    """JWTのペイロードから exp を取り出す（署名検証はAPI側で行う）"""
+    try:
+        payload_b64 = access_token.split(".")[1]
+        payload_b64 += "=" * (-len(payload_b64) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload_b64))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        # exp が読めない場合は期限切れ扱いにせず、そのまま使い続ける
+        return float("inf")
+
+
+def _login():
+    """APIにログインし、SessionのAuthorizationヘッダーと有効期限を更新"""
+    global token_exp_ts
+
+    r = SESSION.post(
+        f"{API_BASE}/api/v1/auth/login",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        data={"username": API_USER, "password": API_PASS},
+        timeout=10,
+    )
+    r.raise_for_status()
+    access_token = r.json()["access_token"]
+    # 以降のリクエストはSessionのAuthorizationヘッダーを使う
+    SESSION.headers["Authorization"] = f"Bearer {access_token}"
+    token_exp_ts = _decode_token_exp(access_token)
+    return access_token
 
 
 def get_token():
     """APIにログインしてJWTトークンを取得"""
     print(f"[i] ログイン中... (user={API_USER})")
     try:
-        r = requests.post(
-            f"{API_BASE}/api/v1/auth/login",
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-            data={"username": API_USER, "password": API_PASS},
-            timeout=10,
-        )
-        r.raise_for_status()
-        token_data = r.json()
+        with _token_lock:
+            access_token = _login()
         print(f"[i] ログイン成功")
-        return token_data["access_token"]
+        return access_token
     except requests.exceptions.RequestException as e:
         print(f"[!] ログインエラー: {e}")
         sys.exit(1)
 
 
-def post_punch(token, card_idm_hex, punch_type):
+def ensure_token():
+    """トークンの期限が近ければ再ログイン（失敗時は現在のトークンで続行）"""
+    with _token_lock:
+        if time.time() < token_exp_ts - TOKEN_REFRESH_MARGIN:
+            return
+        try:
+            _login()
+            print("[i] トークンを更新しました")
+        except requests.exceptions.RequestException as e:
+            print(f"[!] トークン更新エラー: {e}")
+
+
+def post_punch(card_idm_hex, punch_type):
     """打刻APIにリクエストを送信"""
+    ensure_token()
     payload = {"card_idm": card_idm_hex, "punch_type": punch_type}
     try:
-        r = requests.post(
+        r = SESSION.post(
             f"{API_BASE}/api/v1/punch/",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            },
-            data=json.dumps(payload),
+            data=ENCODE(payload),
             timeout=10,
         )
         # 409(重複)や400(遷移不正)はそのまま表示
@@ -76,13 +145,58 @@ def post_punch(token, card_idm_hex, punch_type):
         return 0, f"Network Error: {e}"
 
 
+def print_punch_result(status, body):
+    """打刻APIのレスポンスを整形して表示"""
+    if status == 200:
+        try:
+            response_json = json.loads(body)
+            message = response_json.get("message", "")
+            print(f"    ✓ 成功 [{status}]: {message}")
+        except json.JSONDecodeError:
+            print(f"    ✓ 成功 [{status}]")
+    elif status == 409:
+        print(f"    ⚠ 重複エラー [{status}]: 3分以上待ってから再試行してください")
+    elif status == 400:
+        try:
+            error_json = json.loads(body)
+            error_msg = error_json.get("error", {}).get("message", body)
+            print(f"    ✗ エラー [{status}]: {error_msg}")
+        except json.JSONDecodeError:
+            print(f"    ✗ エラー [{status}]: {body}")
+    else:
+        print(f"    ✗ エラー [{status}]: {body}")
+
+
+def punch_worker():
+    """キューに積まれた打刻をAPIへ送信するワーカースレッド
+
+    _STOP_WORKER を受け取るまで動き続ける。番兵はキューの末尾に積まれるため、
+    それまでに積まれた打刻は終了時にもすべて送信される。
+    """
+    while True:
+        item = TAP_QUEUE.get()
+        if item is _STOP_WORKER:
+            TAP_QUEUE.task_done()
+            return
+        idm, punch_type = item
+        try:
+            status, body = post_punch(idm, punch_type)
+            print(f"[>] 送信結果: IDm={idm} ({punch_type})")
+            print_punch_result(status, body)
+        except Exception as e:
+            print(f"[!] 打刻送信中にエラーが発生: {e}")
+        finally:
+            TAP_QUEUE.task_done()
+
+
 def on_connect(tag):
     """カードがタップされたときのコールバック"""
-    global last_idx, token
+    global last_idx
 
     try:
         # FeliCa (IDm) を取得
         if hasattr(tag, "idm"):
+            # bytes.hex() はC実装で、8バイトのIDmでは参照テーブルによる変換より速い
             idm = tag.idm.hex()  # 例: 0123456789abcdef
         else:
             # FeliCa以外でもIDが取れる場合は fallback
@@ -99,31 +213,14 @@ def on_connect(tag):
         print(f"\n[+] タップ検知: IDm={idm}")
         print(f"    → 打刻タイプ: {punch_type}")
 
-        # API呼び出し
-        status, body = post_punch(token, idm, punch_type)
-
-        # レスポンスを整形して表示
-        if status == 200:
-            try:
-                response_json = json.loads(body)
-                message = response_json.get("message", "")
-                print(f"    ✓ 成功 [{status}]: {message}")
-            except json.JSONDecodeError:
-                print(f"    ✓ 成功 [{status}]")
-        elif status == 409:
-            print(f"    ⚠ 重複エラー [{status}]: 3分以上待ってから再試行してください")
-        elif status == 400:
-            try:
-                error_json = json.loads(body)
-                error_msg = error_json.get("error", {}).get("message", body)
-                print(f"    ✗ エラー [{status}]: {error_msg}")
-            except json.JSONDecodeError:
-                print(f"    ✗ エラー [{status}]: {body}")
-        else:
-            print(f"    ✗ エラー [{status}]: {body}")
+        # API呼び出しはワーカースレッドに任せ、読み取りをブロックしない
+        try:
+            TAP_QUEUE.put_nowait((idm, punch_type))
+        except queue.Full:
+            print("[!] 送信待ちの打刻が多すぎるため、このタップを破棄しました")
 
         # デバウンス（連続タップ防止）
-        time.sleep(1.5)
+        time.sleep(TAP_DEBOUNCE_SECONDS)
 
     except Exception as e:
         print(f"[!] 処理中にエラーが発生: {e}")
@@ -133,15 +230,12 @@ def on_connect(tag):
 
 def signal_handler(sig, frame):
     """シグナルハンドラ（Ctrl+C対応）"""
-    global terminate_flag
     print("\n\n[i] 終了シグナルを受信しました...")
-    terminate_flag = True
+    TERMINATE.set()
 
 
 def main():
     """メイン処理"""
-    global token, terminate_flag
-
     # シグナルハンドラを設定
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -155,7 +249,11 @@ def main():
     print("=" * 60)
 
     # トークン取得
-    token = get_token()
+    get_token()
+
+    # 打刻送信ワーカー起動
+    worker = threading.Thread(target=punch_worker, name="punch-worker", daemon=True)
+    worker.start()
 
     # 接続文字列の候補（汎用 → RC-S380 → RC-S300）
     candidates = [
@@ -194,16 +292,12 @@ def main():
         print("=" * 60)
         sys.exit(1)
 
-    def terminate_callback():
-        """終了判定用コールバック"""
-        return terminate_flag
-
     try:
         print("\n" + "=" * 60)
         print("[i] カードをタップしてください（Ctrl+Cで終了）")
         print("=" * 60 + "\n")
 
-        while not terminate_flag:
+        while not TERMINATE.is_set():
             # タイムアウト付きでconnect
             # terminate コールバックで終了制御
             try:
@@ -212,20 +306,21 @@ def main():
                         "on-connect": on_connect,
                         "on-discover": lambda tag: True  # カード検知時は処理継続
                     },
-                    terminate=terminate_callback
+                    terminate=TERMINATE.is_set
                 )
             except Exception as e:
-                if terminate_flag:
+                if TERMINATE.is_set():
                     break
                 print(f"[!] 接続エラー: {e}")
-                time.sleep(0.5)
+                # 終了シグナルを受けたら待機を中断する
+                TERMINATE.wait(0.5)
 
     except KeyboardInterrupt:
         print("\n\n[i] 終了します...")
-        terminate_flag = True
+        TERMINATE.set()
     except Exception as e:
         print(f"\n[!] 予期しないエラー: {e}")
-        terminate_flag = True
+        TERMINATE.set()
     finally:
         if clf:
             try:
@@ -233,6 +328,26 @@ def main():
                 print("[i] リーダーを閉じました")
             except Exception:
                 pass
+        stop_worker(worker)
+
+
+def stop_worker(worker):
+    """送信待ちの打刻を送り切ってからワーカーを止める
+
+    ワーカーは daemon スレッドなので、API が応答しない場合でも
+    TAP_DRAIN_TIMEOUT_SECONDS を過ぎればプロセスは終了できる。
+    """
+    pending = TAP_QUEUE.qsize()
+    if pending:
+        print(f"[i] 送信待ちの打刻 {pending} 件を送信しています...")
+    try:
+        TAP_QUEUE.put(_STOP_WORKER, timeout=TAP_DRAIN_TIMEOUT_SECONDS)
+    except queue.Full:
+        pass
+    else:
+        worker.join(TAP_DRAIN_TIMEOUT_SECONDS)
+    if worker.is_alive():
+        print(f"[!] 未送信の打刻 {TAP_QUEUE.qsize()} 件を破棄して終了します")
 
 
 if __name__ == "__main__":
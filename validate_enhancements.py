@@ -9,26 +9,75 @@ Validates all enhanced backend features:
 - Security features
 """
 
+import os
 import sys
 import time
 import asyncio
 import importlib
+import importlib.util
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextvars import ContextVar, copy_context
+from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+try:
+    # Same loop policy as backend.app.websocket_enhanced; optional for this script
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+# Persist numba's compiled kernels between runs (only effective for @njit(cache=True)).
+# The cache is only reused by processes that export the same NUMBA_CACHE_DIR,
+# so CI sets it for the whole job; an exported value always wins here.
+os.environ.setdefault("NUMBA_CACHE_DIR", str(Path(__file__).parent / ".numba_cache"))
 
 # Add backend to path
 sys.path.append(str(Path(__file__).parent / "backend"))
 
+# Both Redis-backed checks share one pool instead of connecting separately
+REDIS_URL = "redis://localhost:6379/15"
+
+# Report lines are collected here and written in a few large chunks
+_REPORT: List[str] = []
+
+# Per-test report chunk while tests run concurrently (_REPORT when unset)
+_output: ContextVar[Optional[List[str]]] = ContextVar("validation_output", default=None)
+
+def _report() -> List[str]:
+    """Return the list the current test should append its output to"""
+    chunk = _output.get()
+    return _REPORT if chunk is None else chunk
+
+def _line(text: str = ""):
+    """Append one line to the current report (no I/O)"""
+    _report().append(text + "\n")
+
+def _flush_report():
+    """Write everything collected in _REPORT with a single write() call"""
+    sys.stdout.write("".join(_REPORT))
+    sys.stdout.flush()
+    _REPORT.clear()
+
+# Fixed pieces of each print_status entry
+_PASS = "✅ PASS "
+_FAIL = "❌ FAIL "
+_DETAIL_INDENT = "    "
+
 def print_status(test_name: str, success: bool, details: str = ""):
     """Print test status with formatting"""
-    status = "✅ PASS" if success else "❌ FAIL"
-    print(f"{status} {test_name}")
+    report = _report()
+    report.extend((_PASS if success else _FAIL, test_name, "\n"))
     if details:
-        print(f"    {details}")
-    print()
+        report.extend((_DETAIL_INDENT, details, "\n"))
+    report.append("\n")
 
 def test_imports():
     """Test that all enhanced modules can be imported"""
-    print("🔍 Testing Enhanced Module Imports...")
+    _line("🔍 Testing Enhanced Module Imports...")
     
     modules_to_test = [
         "backend.app.websocket_enhanced",
@@ -42,27 +91,34 @@ def test_imports():
     
     failed_imports = []
     
-    for module_name in modules_to_test:
-        try:
-            importlib.import_module(module_name)
-            print_status(f"Import {module_name}", True)
-        except Exception as e:
-            print_status(f"Import {module_name}", False, str(e))
-            failed_imports.append(module_name)
+    # Import in parallel; results are reported in submission order so the report is stable
+    with ThreadPoolExecutor(max_workers=len(modules_to_test)) as executor:
+        futures = [
+            executor.submit(importlib.import_module, module_name)
+            for module_name in modules_to_test
+        ]
+        for module_name, future in zip(modules_to_test, futures):
+            try:
+                future.result()
+                print_status(f"Import {module_name}", True)
+            except Exception as e:
+                print_status(f"Import {module_name}", False, str(e))
+                failed_imports.append(module_name)
     
     return len(failed_imports) == 0
 
-async def test_websocket_manager():
+async def test_websocket_manager(redis_pool: Optional[redis.ConnectionPool] = None):
     """Test WebSocket manager functionality"""
-    print("🔌 Testing Enhanced WebSocket Manager...")
+    _line("🔌 Testing Enhanced WebSocket Manager...")
     
     try:
-        from backend.app.websocket_enhanced import EnhancedNFCConnectionManager
+        from backend.app.websocket_enhanced import ConnMeta, EnhancedNFCConnectionManager
         
         # Create manager instance
         manager = EnhancedNFCConnectionManager(
-            redis_url="redis://localhost:6379/15",
-            max_connections=5
+            redis_url=REDIS_URL,
+            max_connections=5,
+            redis_pool=redis_pool
         )
         
         # Test initialization
@@ -81,12 +137,9 @@ async def test_websocket_manager():
         has_metrics = len(metrics["response_time"]) > 0
         print_status("Performance Metrics Recording", has_metrics)
         
-        # Test connection tracking
-        manager.connection_metadata["test_client"] = {
-            "connected_at": time.time(),
-            "last_activity": time.time(),
-            "message_count": 0
-        }
+        # Test connection tracking (same record optimized_connect stores)
+        now = datetime.now()
+        manager.connection_metadata["test_client"] = ConnMeta(now, now, 0)
         
         connection_count = len(manager.connection_metadata)
         print_status("Connection Tracking", connection_count > 0)
@@ -103,7 +156,7 @@ async def test_websocket_manager():
 
 def test_nfc_validator():
     """Test NFC validation functionality"""
-    print("🏷️ Testing NFC Validation...")
+    _line("🏷️ Testing NFC Validation...")
     
     try:
         from backend.app.api.nfc_enhanced import NFCValidator
@@ -149,7 +202,7 @@ def test_nfc_validator():
 
 def test_security_features():
     """Test security features"""
-    print("🔒 Testing Security Features...")
+    _line("🔒 Testing Security Features...")
     
     try:
         from backend.app.security.enhanced_auth import SecurityValidator, TokenManager
@@ -191,9 +244,9 @@ def test_security_features():
         print_status("Security Features Test", False, str(e))
         return False
 
-async def test_monitoring_system():
+async def test_monitoring_system(redis_pool: Optional[redis.ConnectionPool] = None):
     """Test monitoring system"""
-    print("📊 Testing Monitoring System...")
+    _line("📊 Testing Monitoring System...")
     
     try:
         from backend.app.monitoring.system_monitor import SystemMonitor, PerformanceMetrics
@@ -209,7 +262,7 @@ async def test_monitoring_system():
         print_status("Performance Metrics Collection", has_data)
         
         # Test system monitor initialization
-        monitor = SystemMonitor(redis_url="redis://localhost:6379/15")
+        monitor = SystemMonitor(redis_url=REDIS_URL, redis_pool=redis_pool)
         
         try:
             await monitor.initialize()
@@ -238,7 +291,7 @@ async def test_monitoring_system():
 
 def test_performance_optimizer():
     """Test performance optimizer"""
-    print("⚡ Testing Performance Optimizer...")
+    _line("⚡ Testing Performance Optimizer...")
     
     try:
         from backend.app.performance.async_optimizer import AsyncOptimizer
@@ -263,7 +316,7 @@ def test_performance_optimizer():
 
 def test_logging_system():
     """Test enhanced logging system"""
-    print("📝 Testing Enhanced Logging...")
+    _line("📝 Testing Enhanced Logging...")
     
     try:
         from backend.app.logging.enhanced_logger import EnhancedLogger, SecurityLogger
@@ -304,7 +357,7 @@ def test_logging_system():
 
 async def test_integration():
     """Test integration between components"""
-    print("🔄 Testing Component Integration...")
+    _line("🔄 Testing Component Integration...")
     
     try:
         # Test that components can work together
@@ -328,53 +381,146 @@ async def test_integration():
         print_status("Integration Test", False, str(e))
         return False
 
-def calculate_performance_score(test_results):
+def calculate_performance_score(passed_tests: int, total_tests: int) -> float:
     """Calculate overall performance score"""
-    total_tests = len(test_results)
-    passed_tests = sum(test_results.values())
+    return passed_tests / total_tests * 100 if total_tests else 0
+
+def warm_numba_cache():
+    """Compile the numba kernels once so later runs load them from NUMBA_CACHE_DIR"""
+    import numpy as np
+
+    # Load the kernel module by path under its real name (the name keys the cache
+    # entries) without running backend.app.utils/__init__, which opens the offline DB.
+    # Registering it in sys.modules keeps numba's cache loader from importing the package.
+    path = Path(__file__).parent / "backend" / "app" / "utils" / "_wage_kernels.py"
+    spec = importlib.util.spec_from_file_location("backend.app.utils._wage_kernels", path)
+    kernels = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = kernels
+    spec.loader.exec_module(kernels)
     
-    score = (passed_tests / total_tests) * 100
-    return score, passed_tests, total_tests
+    # numba compiles per argument type: scalars (daily/threshold) and arrays (payroll batch)
+    hours = np.zeros(1)
+    kernels.floor_to_unit(0.0, 0.01)
+    kernels.floor_to_unit(hours, 1.0)
+    kernels.daily_wage_kernel(0.0, 0, 0, 0, 0, 1.25, 1.25, 1.35)
+    kernels.overtime_wage_kernel(0.0, 0.0, 0.0, 60.0, 1.25, 1.5)
+    kernels.overtime_wage_kernel(hours, hours, hours, 60.0, 1.25, 1.5)
 
-async def main():
+VALIDATION_TESTS = [
+    ("imports", test_imports),
+    ("websocket", test_websocket_manager),
+    ("nfc_validator", test_nfc_validator),
+    ("security", test_security_features),
+    ("monitoring", test_monitoring_system),
+    ("optimizer", test_performance_optimizer),
+    ("logging", test_logging_system),
+    ("integration", test_integration),
+]
+
+# Tests that take the shared redis_pool argument
+REDIS_TESTS = {"websocket", "monitoring"}
+
+def _run_captured(test, chunk: List[str], **kwargs):
+    """Run one sync test with its report lines collected into chunk"""
+    _output.set(chunk)
+    return test(**kwargs)
+
+async def _run_captured_async(test, chunk: List[str], **kwargs):
+    """Run one async test with its report lines collected into chunk"""
+    # gather() runs each coroutine in its own task, so this only affects the current test
+    _output.set(chunk)
+    return await test(**kwargs)
+
+def run_sync_tests() -> Dict[str, Tuple[Any, List[str]]]:
+    """Run the plain (non-async) checks in a thread pool, without an event loop"""
+    tests = [(name, test) for name, test in VALIDATION_TESTS if not asyncio.iscoroutinefunction(test)]
+    chunks: List[List[str]] = [[] for _ in tests]
+    
+    # The import check runs alone first: once it has loaded the backend modules, the
+    # pooled checks only hit sys.modules instead of racing each other through
+    # half-initialized packages (which surfaces as spurious "cannot import name" errors)
+    first = [i for i, (name, _) in enumerate(tests) if name == "imports"]
+    rest = [i for i in range(len(tests)) if i not in first]
+    futures: Dict[int, Future] = {}
+    
+    with ThreadPoolExecutor(max_workers=max(len(rest), 1)) as executor:
+        # Each test gets its own copy of the context so _output.set() stays local to it
+        for group in (first, rest):
+            for i in group:
+                futures[i] = executor.submit(copy_context().run, _run_captured, tests[i][1], chunks[i])
+            wait([futures[i] for i in group])
+    
+    outcomes = {}
+    for i, ((name, _), chunk) in enumerate(zip(tests, chunks)):
+        error = futures[i].exception()
+        outcomes[name] = (futures[i].result() if error is None else error, chunk)
+    return outcomes
+
+async def run_async_tests() -> Dict[str, Tuple[Any, List[str]]]:
+    """Run the Redis/WebSocket-bound checks concurrently on one event loop"""
+    tests = [(name, test) for name, test in VALIDATION_TESTS if asyncio.iscoroutinefunction(test)]
+    chunks: List[List[str]] = [[] for _ in tests]
+    
+    redis_pool = redis.ConnectionPool.from_url(REDIS_URL, max_connections=16, decode_responses=True)
+    try:
+        results = await asyncio.gather(
+            *(
+                _run_captured_async(test, chunk, **({"redis_pool": redis_pool} if name in REDIS_TESTS else {}))
+                for (name, test), chunk in zip(tests, chunks)
+            ),
+            return_exceptions=True
+        )
+    finally:
+        await redis_pool.disconnect()
+    
+    return {name: (result, chunk) for (name, _), result, chunk in zip(tests, results, chunks)}
+
+def main():
     """Run all validation tests"""
-    print("🚀 Enhanced Backend Validation Report")
-    print("=" * 50)
-    print()
+    _line("🚀 Enhanced Backend Validation Report")
+    _line("=" * 50)
+    _line()
+    _flush_report()
     
-    test_results = {}
+    # Only the async checks need an event loop; the sync ones run before it starts
+    outcomes = run_sync_tests()
+    outcomes.update(asyncio.run(run_async_tests()))
     
-    # Run tests
-    test_results["imports"] = test_imports()
-    test_results["websocket"] = await test_websocket_manager()
-    test_results["nfc_validator"] = test_nfc_validator()
-    test_results["security"] = test_security_features()
-    test_results["monitoring"] = await test_monitoring_system()
-    test_results["optimizer"] = test_performance_optimizer()
-    test_results["logging"] = test_logging_system()
-    test_results["integration"] = await test_integration()
+    # Flush once per test group, in the original order
+    test_results = {}
+    passed = total = 0
+    for name, _ in VALIDATION_TESTS:
+        result, chunk = outcomes[name]
+        _REPORT.extend(chunk)
+        if isinstance(result, BaseException):
+            print_status(f"{name} test", False, repr(result))
+            result = False
+        test_results[name] = result
+        passed += bool(result)
+        total += 1
+        _flush_report()
     
     # Calculate results
-    score, passed, total = calculate_performance_score(test_results)
+    score = calculate_performance_score(passed, total)
     
-    print("=" * 50)
-    print("📋 VALIDATION SUMMARY")
-    print("=" * 50)
-    print(f"Tests Passed: {passed}/{total}")
-    print(f"Success Rate: {score:.1f}%")
-    print()
+    _line("=" * 50)
+    _line("📋 VALIDATION SUMMARY")
+    _line("=" * 50)
+    _line(f"Tests Passed: {passed}/{total}")
+    _line(f"Success Rate: {score:.1f}%")
+    _line()
     
     if score >= 90:
-        print("🎉 EXCELLENT: All critical features working!")
+        _line("🎉 EXCELLENT: All critical features working!")
     elif score >= 75:
-        print("✅ GOOD: Most features working, minor issues")
+        _line("✅ GOOD: Most features working, minor issues")
     elif score >= 50:
-        print("⚠️  FAIR: Some features need attention")
+        _line("⚠️  FAIR: Some features need attention")
     else:
-        print("❌ POOR: Major issues detected")
+        _line("❌ POOR: Major issues detected")
     
-    print()
-    print("🎯 PERFORMANCE TARGETS ACHIEVED:")
+    _line()
+    _line("🎯 PERFORMANCE TARGETS ACHIEVED:")
     
     targets = [
         ("WebSocket Latency < 50ms", "✅ Target: <50ms, Enhanced manager optimized"),
@@ -385,11 +531,10 @@ async def main():
         ("Structured Logging", "✅ Target: JSON logs with audit trail"),
     ]
     
-    for target, status in targets:
-        print(f"  {status}")
+    _REPORT.append("\n".join(f"  {status}" for _, status in targets) + "\n")
     
-    print()
-    print("🔧 ENHANCED FEATURES IMPLEMENTED:")
+    _line()
+    _line("🔧 ENHANCED FEATURES IMPLEMENTED:")
     features = [
         "✅ Enhanced WebSocket connection manager with Redis",
         "✅ NFC Bridge API with rate limiting and validation", 
@@ -401,17 +546,21 @@ async def main():
         "✅ Comprehensive test suite"
     ]
     
-    for feature in features:
-        print(f"  {feature}")
+    _REPORT.append("\n".join(f"  {feature}" for feature in features) + "\n")
     
-    print()
+    _line()
     if score >= 75:
-        print("🚀 Backend optimization complete! Ready for iPhone Suica integration.")
+        _line("🚀 Backend optimization complete! Ready for iPhone Suica integration.")
     else:
-        print("⚠️  Please check failed tests and ensure Redis is running for full functionality.")
+        _line("⚠️  Please check failed tests and ensure Redis is running for full functionality.")
     
+    _flush_report()
     return score
 
 if __name__ == "__main__":
-    score = asyncio.run(main())
+    if "--warm-cache" in sys.argv[1:]:
+        # CI build step: populate NUMBA_CACHE_DIR and exit without running the checks
+        warm_numba_cache()
+        sys.exit(0)
+    score = main()
     sys.exit(0 if score >= 75 else 1)
\ No newline at end of file